@@ -7,10 +7,14 @@ def setup_routers(app: FastAPI):
     from .auth import router as auth_router
     from .user import router as user_router
     from .period import period_router
+    from .diagnostics import router as diagnostics_router
+    from .jobs import router as jobs_router
     # Include routers
     settings = get_settings()
     app.include_router(auth_router, prefix=f"{settings.api_v1_str}/auth", tags=["Auth"])
     app.include_router(user_router, prefix=f"{settings.api_v1_str}", tags=["User"])
     app.include_router(period_router, prefix=f"{settings.api_v1_str}", tags=["Periods"])
+    app.include_router(diagnostics_router, prefix=f"{settings.api_v1_str}", tags=["Diagnostics"])
+    app.include_router(jobs_router, prefix=f"{settings.api_v1_str}", tags=["Jobs"])
 
     return app
@@ -9,12 +9,14 @@ from app.api.deps import refresh_user
 from app.core.config import get_settings
 from app.core.database import get_async_session
 from app.core.security import (
-    verify_password,
+    verify_password_async,
     create_access_token,
+    user_token_claims,
 )
 from app.models.user import User, UserCreate, UserRead, Token
 from app.schemas.user import UserLogin
 from app.services.user import UserService
+from app.services.write_behind import user_writes
 
 settings = get_settings()
 router = APIRouter()
@@ -24,11 +26,11 @@ def get_user_service(db: AsyncSession = Depends(get_async_session)) -> UserServi
     return UserService(db)
 
 
-def create_access_token_and_cookies(email: str, response: Response) -> tuple[str, Response]:
+def create_access_token_and_cookies(user: User, response: Response) -> tuple[str, Response]:
     # Create access token
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": email},
+        data=user_token_claims(user),
         expires_delta=access_token_expires
     )
 
@@ -74,19 +76,18 @@ async def login(
     result = await session.execute(statement)
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username/email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Update last login
-    user.last_login = datetime.now(UTC)
-    session.add(user)
-    await session.commit()
+    # Written behind in batches, keeping login read-only
+    # Naive UTC: the column is TIMESTAMP WITHOUT TIME ZONE, which asyncpg won't bind an aware value to
+    user_writes.record(user.id, last_login=datetime.now(UTC).replace(tzinfo=None))
 
-    access_token, response = create_access_token_and_cookies(user.email, response)
+    access_token, response = create_access_token_and_cookies(user, response)
 
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -96,7 +97,7 @@ async def refresh(
         response: Response,
         user: User = Depends(refresh_user)
 ):
-    access_token, response = create_access_token_and_cookies(user.email, response)
+    access_token, response = create_access_token_and_cookies(user, response)
 
     return {"access_token": access_token, "token_type": "bearer"}
 
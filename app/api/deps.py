@@ -1,87 +1,136 @@
-from fastapi import Depends, HTTPException, status, Request
+import hashlib
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import get_settings
-from app.core.database import get_async_session
+from app.core.database import READ_MARKER_COOKIE, get_async_session, read_router
 from app.models.user import User
+from app.schemas.user import TokenData
+from app.services.data_version import DataVersionService
+from app.services.user_cache import user_cache, auth_states, user_lookups
 
 settings = get_settings()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.api_v1_str}/auth/login", auto_error=False)
 
 
-def verify_user_in_jwt(token: str) -> str:
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_access_token(token: str) -> dict:
     try:
         if token is None:
-            raise credentials_exception
+            raise credentials_exception()
         payload = jwt.decode(
             token, settings.secret_key, algorithms=[settings.algorithm]
         )
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        return email
+        if payload.get("sub") is None:
+            raise credentials_exception()
+        return payload
     except JWTError as e:
         print(e)
-        raise credentials_exception
+        raise credentials_exception()
+
+
+def verify_user_in_jwt(token: str) -> str:
+    return decode_access_token(token)["sub"]
 
 
 async def refresh_user(
         request: Request,
         session: AsyncSession = Depends(get_async_session)
 ) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
     # Try to get token from cookie
     token = request.cookies.get("refresh_token")
     if token and token.startswith("Bearer "):
         token = token.split(" ")[1]
     else:
-        raise credentials_exception
+        raise credentials_exception()
 
-    email = verify_user_in_jwt(token)
+    payload = decode_access_token(token)
 
-    statement = select(User).where(User.email == email)
+    statement = select(User).where(User.email == payload["sub"])
     result = await session.execute(statement)
     user = result.scalar_one_or_none()
 
-    if user is None:
-        raise credentials_exception
+    if user is None or not user.is_active or payload.get("ver") != user.token_version:
+        raise credentials_exception()
     return user
 
 
+async def _load_user(session: AsyncSession, email: str) -> dict | None:
+    statement = select(User).where(User.email == email)
+    result = await session.execute(statement)
+    user = result.scalar_one_or_none()
+    if user is None:
+        return None
+    user_cache.set(email, user)
+    auth_states.observe(user)
+    return user.model_dump()
+
+
 async def get_current_user(
         token: str = Depends(oauth2_scheme),
         session: AsyncSession = Depends(get_async_session)
 ) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    email = verify_user_in_jwt(token)
-
-    statement = select(User).where(User.email == email)
-    result = await session.execute(statement)
-    user = result.scalar_one_or_none()
+    payload = decode_access_token(token)
+    email = payload["sub"]
 
+    user = user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        # Parallel requests of one client share a single lookup
+        data = await user_lookups.do(email, lambda: _load_user(session, email))
+        if data is None:
+            raise credentials_exception()
+        user = User(**data)
+
+    # Tokens issued before the last password change / deactivation are stale
+    if not user.is_active or payload.get("ver") != user.token_version:
+        raise credentials_exception()
     return user
 
 
+async def get_current_principal(
+        token: str = Depends(oauth2_scheme),
+        session: AsyncSession = Depends(get_async_session)
+) -> TokenData:
+    """
+    Identity of the caller from the token claims. Whether the token is still valid, and whether the
+    caller is an admin, comes from the user's current state (see AuthStateCache), not the claims.
+    """
+    payload = decode_access_token(token)
+    try:
+        user_id = UUID(payload["uid"])
+        token_version = int(payload["ver"])
+    except (KeyError, TypeError, ValueError):
+        raise credentials_exception()
+
+    state = await auth_states.get(session, user_id)
+    if state is None or not state["is_active"] or state["token_version"] != token_version:
+        raise credentials_exception()
+    return TokenData(
+        email=payload["sub"],
+        id=user_id,
+        is_superuser=state["is_superuser"],
+        is_active=True,
+        token_version=token_version,
+    )
+
+
 async def get_current_user_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: TokenData = Depends(get_current_principal)
+) -> TokenData:
     """
     Verify the current user has admin privileges
     """
@@ -91,3 +140,72 @@ async def get_current_user_admin(
             detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+async def get_read_session(request: Request, current_user: TokenData = Depends(get_current_principal)):
+    """
+    Read-only session for the caller, on a replica unless they wrote recently (see ReadRouter).
+    Never write through it.
+    """
+    async with read_router.session(current_user.id, request.cookies.get(READ_MARKER_COOKIE)) as session:
+        yield session
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified_since(if_modified_since: str, updated_at: Optional[datetime]) -> bool:
+    if updated_at is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have second precision
+    return updated_at.astimezone(timezone.utc).replace(microsecond=0) <= since
+
+
+def conditional_get(daily: bool = False):
+    """
+    Dependency for conditional GETs driven by the caller's data version.
+    A matching If-None-Match (or, without one, If-Modified-Since) is answered with 304 before
+    the endpoint runs. Otherwise the ETag/Last-Modified headers are set on the response and
+    also returned, for endpoints that build their own Response.
+    `daily` folds today's date into the ETag, for bodies that depend on it (rolling windows).
+    """
+
+    async def dependency(
+            request: Request,
+            response: Response,
+            current_user: TokenData = Depends(get_current_principal),
+            session: AsyncSession = Depends(get_read_session)
+    ) -> dict:
+        version, updated_at = await DataVersionService(session).get(current_user.id)
+        scope = f"{current_user.id}:{request.url.path}?{sorted(request.query_params.multi_items())}"
+        if daily:
+            scope += f":{date.today().isoformat()}"
+        etag = f'"{version}-{hashlib.sha256(scope.encode()).hexdigest()[:16]}"'
+
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if updated_at is not None and not daily:
+            headers["Last-Modified"] = format_datetime(updated_at.astimezone(timezone.utc), usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, etag)
+        else:
+            if_modified_since = request.headers.get("if-modified-since")
+            not_modified = (
+                if_modified_since is not None and "Last-Modified" in headers
+                and _not_modified_since(if_modified_since, updated_at)
+            )
+        if not_modified:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+        return headers
+
+    return dependency
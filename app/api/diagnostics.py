@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_user_admin
+from app.core.cache import invalidation_channel
+from app.core.database import database, read_router
+from app.core.security import password_pool
+from app.schemas.user import TokenData
+from app.services.period import period_reads
+from app.services.response_cache import response_cache
+from app.services.user_cache import user_cache, user_lookups
+from app.services.jobs import job_runner
+from app.services.write_behind import user_writes
+
+router = APIRouter(prefix="/diagnostics")
+
+
+@router.get("")
+async def read_diagnostics(
+        current_user: TokenData = Depends(get_current_user_admin)
+):
+    """Runtime metrics for sizing worker pools and caches"""
+    return {
+        "password_pool": password_pool.stats(),
+        "user_cache": user_cache.stats(),
+        "invalidation_channel": invalidation_channel.stats(),
+        "response_cache": response_cache.stats(),
+        "read_routing": read_router.stats(),
+        "write_behind": user_writes.stats(),
+        "jobs": job_runner.stats(),
+        "single_flight": {"period_reads": period_reads.stats(), "user_lookups": user_lookups.stats()},
+    }
+
+
+@router.get("/database")
+async def read_database_diagnostics(
+        current_user: TokenData = Depends(get_current_user_admin)
+):
+    """Database tuning profile, pool status and effective connection settings"""
+    return await database.describe()
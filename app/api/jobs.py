@@ -0,0 +1,41 @@
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette import status
+
+from app.api.deps import get_current_principal, get_current_user_admin
+from app.core.database import get_async_session
+from app.models.job import Job
+from app.schemas.job import JobRead
+from app.schemas.user import TokenData
+from app.services.jobs import job_runner
+
+router = APIRouter(prefix="/jobs")
+
+
+@router.get("/{job_id}", response_model=JobRead)
+async def read_job(
+        job_id: UUID,
+        session: AsyncSession = Depends(get_async_session),
+        current_user: TokenData = Depends(get_current_principal)
+):
+    """Status of a background job started by (or for) the current user"""
+    job = await session.get(Job, job_id)
+    if job is None or (job.user_id != current_user.id and not current_user.is_superuser):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.post("/rebuild-calendar", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_calendar(
+        user_id: Optional[UUID] = Query(None, description="Only rebuild this user's calendar"),
+        session: AsyncSession = Depends(get_async_session),
+        current_user: TokenData = Depends(get_current_user_admin)
+):
+    """Backfill the period_day table in the background; poll GET /jobs/{id} for the outcome"""
+    payload = {"user_id": str(user_id)} if user_id else {}
+    job = await job_runner.enqueue(session, "rebuild_calendar", payload, user_id=current_user.id)
+    await session.commit()
+    return job
@@ -1,25 +1,38 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette import status
 from typing import Optional, List
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_principal, get_read_session, conditional_get
 from app.core.database import get_async_session
 from app.models.user import User
+from app.schemas.user import TokenData
 from app.models.period import Period
-from app.schemas.period import PeriodUpdate, PeriodResponse, PeriodCreate, DateIntensityCount
-from app.services.db_services import PaginationParams, PaginatedResponse
-from app.services.period import PeriodService
-
+from app.core.config import get_settings
+from app.schemas.period import (
+    PeriodUpdate, PeriodResponse, PeriodCreate, DateIntensityCount, PeriodBulkCreate, PeriodBulkResult, PeriodChanges
+)
+from app.services.db_services import PaginationParams, PaginatedResponse, lean_response
+from app.services.export import ExportFormat, ENCODERS, MEDIA_TYPES
+from app.services.period import PeriodService, LoadProfile
+
+settings = get_settings()
 period_router = APIRouter(prefix="/periods")
+period_page_adapter = TypeAdapter(PaginatedResponse[PeriodResponse])
 
 
 def get_period_service(db: AsyncSession = Depends(get_async_session)) -> PeriodService:
     return PeriodService(db, Period)
 
 
+def get_period_read_service(db: AsyncSession = Depends(get_read_session)) -> PeriodService:
+    return PeriodService(db, Period)
+
+
 @period_router.post("", response_model=PeriodResponse, status_code=status.HTTP_201_CREATED)
 async def create_period(
         period: PeriodCreate,
@@ -39,22 +52,77 @@ async def create_period(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@period_router.post("/bulk", response_model=PeriodBulkResult)
+async def bulk_create_periods(
+        bulk: PeriodBulkCreate,
+        period_service: PeriodService = Depends(get_period_service),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Import many periods at once (e.g. history from another tracker).
+    Returns the created IDs and per-item errors; valid items are stored even if others fail.
+    """
+    if len(bulk.items) > settings.bulk_import_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.bulk_import_max_items} periods per import"
+        )
+    return await period_service.bulk_create(current_user.id, bulk.items)
+
+
 @period_router.get("", response_model=PaginatedResponse[PeriodResponse])
 async def list_periods(
         pagination: PaginationParams = Depends(),
-        period_service: PeriodService = Depends(get_period_service),
-        current_user: User = Depends(get_current_user)
+        include_symptoms: bool = Query(True, description="Set to false to skip loading symptoms (returned empty)"),
+        period_service: PeriodService = Depends(get_period_read_service),
+        current_user: TokenData = Depends(get_current_principal),
+        validators: dict = Depends(conditional_get())
 ):
     """
     List periods for the current user with pagination.
     """
-    return await period_service.get_user_periods(current_user.id, pagination)
+    profile = LoadProfile.FULL if include_symptoms else LoadProfile.SUMMARY
+    page = await period_service.get_user_periods(current_user.id, pagination, profile)
+    return lean_response(period_page_adapter, page, headers=validators)
+
+
+@period_router.get("/changes", response_model=PeriodChanges)
+async def get_period_changes(
+        since: Optional[str] = Query(None, description="next_cursor from the previous sync; omit for a full sync"),
+        limit: int = Query(100, ge=1, le=500, description="Maximum upserts and deletes per call"),
+        period_service: PeriodService = Depends(get_period_service),
+        current_user: TokenData = Depends(get_current_principal)
+):
+    """
+    Delta sync for offline-first clients: periods created, updated or deleted since `since`.
+    Keep calling with the returned next_cursor while has_more is true.
+    """
+    return await period_service.get_changes(current_user.id, since, limit)
+
+
+@period_router.get("/export", response_class=StreamingResponse)
+async def export_periods(
+        export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+        period_service: PeriodService = Depends(get_period_service),
+        current_user: TokenData = Depends(get_current_principal)
+):
+    """
+    Download the current user's full period history (with symptoms) as NDJSON or CSV.
+    The body is streamed as rows are read, so it is never held in memory as a whole.
+    """
+    records = period_service.stream_user_history(current_user.id)
+    return StreamingResponse(
+        ENCODERS[export_format](records),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="periods.{export_format.value}"'},
+    )
 
 
 @period_router.get("/intensity-counts", response_model=List[DateIntensityCount])
 async def get_period_intensity_counts(
-    period_service: PeriodService = Depends(get_period_service),
-    current_user: User = Depends(get_current_user)
+    period_service: PeriodService = Depends(get_period_read_service),
+    current_user: TokenData = Depends(get_current_principal),
+    validators: dict = Depends(conditional_get(daily=True))
 ) -> List[DateIntensityCount]:
     """
     Get a list of dates and their corresponding flow intensity counts for the last year.
@@ -67,8 +135,9 @@ async def get_period_intensity_counts(
 
 @period_router.get("/recent", response_model=Optional[PeriodResponse])
 async def get_recent_period(
-        period_service: PeriodService = Depends(get_period_service),
-        current_user: User = Depends(get_current_user)
+        period_service: PeriodService = Depends(get_period_read_service),
+        current_user: TokenData = Depends(get_current_principal),
+        validators: dict = Depends(conditional_get())
 ):
     """
     Get the most recent period for the current user.
@@ -79,15 +148,15 @@ async def get_recent_period(
 @period_router.get("/{period_id}", response_model=PeriodResponse)
 async def get_period(
         period_id: UUID,
-        period_service: PeriodService = Depends(get_period_service),
-        current_user: User = Depends(get_current_user)
+        period_service: PeriodService = Depends(get_period_read_service),
+        current_user: TokenData = Depends(get_current_principal)
 ):
     """
     Get a specific period by ID.
     """
-    period = await period_service.get(period_id)
+    period = await period_service.get_owned(period_id, current_user.id, LoadProfile.FULL)
 
-    if not period or period.user_id != current_user.id:
+    if not period:
         raise HTTPException(status_code=404, detail="Period not found")
 
     return period
@@ -103,21 +172,18 @@ async def update_period(
     """
     Update a specific period entry.
     """
-    # First, get the existing period
-    existing_period = await period_service.get(period_id)
-
-    if not existing_period or existing_period.user_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Period not found")
-
     try:
-        updated_period = await period_service.update(
-            db_obj=existing_period,
-            obj_in=period_update
+        # Ownership is part of the UPDATE's WHERE clause
+        updated_period = await period_service.update_owned(
+            period_id, current_user.id, period_update, LoadProfile.FULL
         )
-        return updated_period
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    if not updated_period:
+        raise HTTPException(status_code=404, detail="Period not found")
+    return updated_period
+
 
 @period_router.delete("/{period_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_period(
@@ -128,13 +194,8 @@ async def delete_period(
     """
     Delete a specific period entry.
     """
-    # First, get the existing period
-    existing_period = await period_service.get(period_id)
-
-    if not existing_period or existing_period.user_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Period not found")
-
-    deleted = await period_service.delete(object_id=period_id)
+    # Ownership is part of the DELETE's WHERE clause
+    deleted = await period_service.delete_owned(period_id, current_user.id)
 
     if not deleted:
-        raise HTTPException(status_code=400, detail="Could not delete period")
+        raise HTTPException(status_code=404, detail="Period not found")
@@ -1,18 +1,25 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
 from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette import status
 from starlette.exceptions import HTTPException
 
-from app.api.deps import get_current_user, get_current_user_admin
+from app.api.deps import (
+    get_current_user, get_current_user_admin, get_current_principal, get_read_session, conditional_get,
+    credentials_exception
+)
 from app.core.database import get_async_session
 from app.models.user import UserRead, User
-from app.schemas.user import UserCreate, UserUpdate, PasswordChange, PasswordChangeAdmin
-from app.services.db_services import PaginatedResponse, PaginationParams
+from app.schemas.job import JobRead
+from app.schemas.user import TokenData, UserCreate, UserUpdate, PasswordChange, PasswordChangeAdmin
+from app.services.db_services import PaginatedResponse, PaginationParams, lean_response
 from app.services.user import UserService
 
 router = APIRouter(prefix="/users")
+user_page_adapter = TypeAdapter(PaginatedResponse[UserRead])
 
 
 def get_user_service(db: AsyncSession = Depends(get_async_session)) -> UserService:
@@ -23,7 +30,7 @@ def get_user_service(db: AsyncSession = Depends(get_async_session)) -> UserServi
 async def create_user(
         user_create: UserCreate,
         user_service: UserService = Depends(get_user_service),
-        current_user: User = Depends(get_current_user_admin)
+        current_user: TokenData = Depends(get_current_user_admin)
 ):
     db_user = await user_service.get_by_email(user_create.email)
     if db_user:
@@ -36,10 +43,18 @@ async def create_user(
 
 @router.get("/me", response_model=UserRead)
 async def read_user_me(
-        current_user: User = Depends(get_current_user)  # Any authenticated user can access their own info
+        # Declared first so a 304 is answered before the user is loaded
+        validators: dict = Depends(conditional_get()),
+        current_user: TokenData = Depends(get_current_principal),  # Any authenticated user can access their own info
+        session: AsyncSession = Depends(get_read_session)
 ):
     """Get current user information"""
-    return current_user
+    # Read after the data version behind the ETag, on the same session, so the body is never older
+    # than its ETag; a process-local cached user may be
+    user = await session.get(User, current_user.id)
+    if user is None:
+        raise credentials_exception()
+    return user
 
 
 @router.patch("/me", response_model=UserRead)
@@ -67,7 +82,7 @@ async def change_password_me(
 async def read_user(
         user_id: UUID,
         user_service: UserService = Depends(get_user_service),
-        current_user: User = Depends(get_current_user_admin)
+        current_user: TokenData = Depends(get_current_user_admin)
 ):
     db_user = await user_service.get_by_id(user_id)
     if not db_user:
@@ -82,9 +97,9 @@ async def read_user(
 async def read_users(
         pagination: PaginationParams = Depends(),
         user_service: UserService = Depends(get_user_service),
-        current_user: User = Depends(get_current_user_admin)
+        current_user: TokenData = Depends(get_current_user_admin)
 ):
-    return await user_service.get_paginated(pagination)
+    return lean_response(user_page_adapter, await user_service.get_paginated(pagination))
 
 
 @router.patch("/{user_id}", response_model=UserRead)
@@ -92,7 +107,7 @@ async def update_user(
         user_id: UUID,
         user_update: UserUpdate,
         user_service: UserService = Depends(get_user_service),
-        current_user: User = Depends(get_current_user_admin)
+        current_user: TokenData = Depends(get_current_user_admin)
 ):
     return await user_service.update(user_id, user_update)
 
@@ -102,17 +117,25 @@ async def change_password(
         user_id: UUID,
         password_change: PasswordChangeAdmin,
         user_service: UserService = Depends(get_user_service),
-        current_user: User = Depends(get_current_user_admin)
+        current_user: TokenData = Depends(get_current_user_admin)
 ):
     await user_service.change_password_admin(user_id, password_change)
     return {"message": "Password changed successfully"}
 
 
-@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{user_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={status.HTTP_202_ACCEPTED: {"model": JobRead, "description": "Large account, purged in the background"}},
+)
 async def delete_user(
         user_id: UUID,
         user_service: UserService = Depends(get_user_service),
-        current_user: User = Depends(get_current_user_admin)
+        current_user: TokenData = Depends(get_current_user_admin)
 ):
-    await user_service.delete(user_id)
-    return None
+    job = await user_service.delete(user_id, requested_by=current_user.id)
+    if job is not None:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED, content=JobRead.model_validate(job).model_dump(mode="json")
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
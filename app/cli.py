@@ -0,0 +1,60 @@
+"""
+Maintenance commands, e.g. `python -m app.cli rebuild-calendar [--user-id UUID]`.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlmodel import select
+
+from app.core.config import get_settings
+from app.core.database import async_session
+from app.models.period import Period, PeriodTombstone
+from app.services.calendar import PeriodCalendar
+from app.services.period import PeriodService
+
+
+async def rebuild_calendar(user_id: UUID | None = None) -> int:
+    async with async_session() as session:
+        rows = await PeriodCalendar(session).rebuild(user_id)
+        await session.commit()
+    return rows
+
+
+async def prune_tombstones() -> int:
+    """Prune expired tombstones of every user, one transaction per user."""
+    cutoff = datetime.now() - timedelta(days=get_settings().period_tombstone_retention_days)
+    pruned = 0
+    async with async_session() as session:
+        result = await session.execute(
+            select(PeriodTombstone.user_id).where(PeriodTombstone.deleted_at < cutoff).distinct()
+        )
+        service = PeriodService(session, Period)
+        for user_id in result.scalars().all():
+            pruned += await service.prune_tombstones(user_id)
+            await session.commit()
+    return pruned
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-calendar", help="Backfill the period_day table from existing periods")
+    rebuild.add_argument("--user-id", type=UUID, default=None, help="Only rebuild this user's calendar")
+
+    commands.add_parser(
+        "prune-tombstones", help="Drop period tombstones older than PERIOD_TOMBSTONE_RETENTION_DAYS"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "rebuild-calendar":
+        rows = asyncio.run(rebuild_calendar(args.user_id))
+        print(f"Rebuilt calendar: {rows} day rows written")
+    elif args.command == "prune-tombstones":
+        print(f"Pruned {asyncio.run(prune_tombstones())} tombstones")
+
+
+if __name__ == "__main__":
+    main()
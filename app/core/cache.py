@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable, List, Optional
+from uuid import uuid4
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from .config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries also expire after `ttl` seconds.
+    Keeps hit/miss/eviction counters so the cache can be sized from /diagnostics.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches `predicate`."""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class InvalidationChannel:
+    """
+    Fan-out of cache invalidation messages.
+    The base class only delivers within the current process, which is enough for a single worker;
+    subclasses relay `publish` to other workers (e.g. over a message bus) and call `deliver` on receipt.
+    """
+    cross_worker = False
+
+    def __init__(self):
+        self._subscribers: List[Callable[[str, str], None]] = []
+
+    def subscribe(self, callback: Callable[[str, str], None]):
+        self._subscribers.append(callback)
+
+    def publish(self, topic: str, message: str):
+        self.deliver(topic, message)
+
+    def deliver(self, topic: str, message: str):
+        for callback in self._subscribers:
+            callback(topic, message)
+
+    async def start(self):
+        """Connect to whatever carries messages between workers."""
+
+    async def stop(self):
+        """Send what is still queued and disconnect."""
+
+    def stats(self) -> dict:
+        return {"kind": type(self).__name__, "subscribers": len(self._subscribers)}
+
+
+class PostgresInvalidationChannel(InvalidationChannel):
+    """
+    Relays messages between workers with Postgres LISTEN/NOTIFY over one dedicated connection per
+    worker. `publish` delivers locally straight away and queues the NOTIFY for a background task.
+    Messages published elsewhere while the connection is down are missed; the caches fall back on
+    their TTLs for those until it reconnects.
+    """
+    cross_worker = True
+
+    def __init__(
+            self,
+            dsn: str,
+            name: str = "cache_invalidation",
+            reconnect_delay: float = 1.0,
+            max_queued: int = 10000,
+    ):
+        super().__init__()
+        self.dsn = dsn
+        self.name = name
+        self.reconnect_delay = reconnect_delay
+        # Lets a worker recognize, and skip, its own notifications
+        self.origin = uuid4().hex
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self._task: Optional[asyncio.Task] = None
+        self._connected = False
+        self._counts = {"sent": 0, "received": 0, "dropped": 0, "reconnects": 0}
+
+    def publish(self, topic: str, message: str):
+        self.deliver(topic, message)
+        try:
+            self._outbox.put_nowait(json.dumps({"origin": self.origin, "topic": topic, "message": message}))
+        except asyncio.QueueFull:
+            self._counts["dropped"] += 1
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        try:
+            data = json.loads(payload)
+            origin, topic, message = data["origin"], data["topic"], data["message"]
+        except (ValueError, TypeError, KeyError):
+            logger.warning("Ignoring malformed invalidation message: %r", payload)
+            return
+        if origin != self.origin:
+            self._counts["received"] += 1
+            self.deliver(topic, message)
+
+    async def _relay(self, connection):
+        while not connection.is_closed():
+            try:
+                payload = await asyncio.wait_for(self._outbox.get(), timeout=self.reconnect_delay)
+            except asyncio.TimeoutError:
+                continue
+            await connection.execute("SELECT pg_notify($1, $2)", self.name, payload)
+            self._counts["sent"] += 1
+
+    async def _run(self):
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except (OSError, asyncpg.PostgresError):
+                logger.warning("Invalidation channel cannot connect; retrying", exc_info=True)
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            try:
+                await connection.add_listener(self.name, self._on_notify)
+                self._connected = True
+                await self._relay(connection)
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                logger.warning("Invalidation channel connection lost; reconnecting", exc_info=True)
+            finally:
+                self._connected = False
+                connection.terminate()
+            self._counts["reconnects"] += 1
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="invalidation-channel")
+
+    async def stop(self, drain_timeout: float = 5.0):
+        if self._task is None:
+            return
+        deadline = time.monotonic() + drain_timeout
+        while not self._outbox.empty() and self._connected and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "connected": self._connected,
+            "queued": self._outbox.qsize(),
+            **self._counts,
+        }
+
+
+def build_invalidation_channel(kind: str, url: str) -> InvalidationChannel:
+    if kind == "local":
+        return InvalidationChannel()
+    if kind == "postgres":
+        parsed = make_url(url)
+        if parsed.get_backend_name() != "postgresql":
+            raise ValueError("invalidation_channel=postgres requires a Postgres invalidation_url or database_url")
+        # asyncpg takes a plain libpq-style DSN
+        return PostgresInvalidationChannel(parsed.set(drivername="postgresql").render_as_string(hide_password=False))
+    raise ValueError(f"Unknown invalidation channel: {kind}")
+
+
+# Shared by every per-worker cache and registry that must hear about other workers' changes
+invalidation_channel = build_invalidation_channel(
+    settings.invalidation_channel, settings.invalidation_url or settings.database_url
+)
@@ -1,9 +1,116 @@
 import os
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy.engine import make_url
 from functools import lru_cache
 from dotenv import load_dotenv
 
 
+class DatabaseProfile(BaseModel):
+    """
+    Engine and connection tuning. None leaves the SQLAlchemy/driver default.
+    Pool options and the postgres_* settings go to create_async_engine; sqlite_* pragmas
+    are applied to every new connection (see app.core.database).
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    echo: bool = False
+    pool_size: Optional[int] = Field(default=None, ge=1)
+    max_overflow: Optional[int] = Field(default=None, ge=0)
+    pool_timeout: Optional[float] = Field(default=None, gt=0)
+    pool_recycle: Optional[int] = None
+    pool_pre_ping: bool = False
+
+    sqlite_journal_mode: Optional[Literal["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"]] = None
+    sqlite_synchronous: Optional[Literal["OFF", "NORMAL", "FULL", "EXTRA"]] = None
+    sqlite_busy_timeout_ms: Optional[int] = Field(default=None, ge=0)
+    # Negative values are KiB, positive values pages
+    sqlite_cache_size: Optional[int] = None
+    sqlite_mmap_size: Optional[int] = Field(default=None, ge=0)
+
+    postgres_statement_timeout_ms: Optional[int] = Field(default=None, ge=0)
+    # Prepared statements asyncpg keeps per connection (0 disables, e.g. behind pgbouncer)
+    postgres_prepared_statement_cache_size: Optional[int] = Field(default=None, ge=0)
+
+    def engine_options(self, dialect_name: str) -> Dict[str, Any]:
+        options = {"echo": self.echo, "pool_pre_ping": self.pool_pre_ping}
+        for name in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+            if getattr(self, name) is not None:
+                options[name] = getattr(self, name)
+        if dialect_name == "postgresql":
+            connect_args = {}
+            if self.postgres_prepared_statement_cache_size is not None:
+                connect_args["prepared_statement_cache_size"] = self.postgres_prepared_statement_cache_size
+            if self.postgres_statement_timeout_ms is not None:
+                # Sent with the connection startup packet, so it costs no extra round trip
+                connect_args["server_settings"] = {"statement_timeout": str(self.postgres_statement_timeout_ms)}
+            if connect_args:
+                options["connect_args"] = connect_args
+        return options
+
+    def sqlite_pragmas(self) -> Dict[str, Any]:
+        pragmas = {
+            "journal_mode": self.sqlite_journal_mode,
+            "synchronous": self.sqlite_synchronous,
+            "busy_timeout": self.sqlite_busy_timeout_ms,
+            "cache_size": self.sqlite_cache_size,
+            "mmap_size": self.sqlite_mmap_size,
+        }
+        return {name: value for name, value in pragmas.items() if value is not None}
+
+    def validate_for(self, dialect_name: str):
+        """Reject options the target database can't use."""
+        if dialect_name != "sqlite" and self.sqlite_pragmas():
+            raise ValueError(f"SQLite pragmas set for a {dialect_name} database")
+        postgres_options = (self.postgres_statement_timeout_ms, self.postgres_prepared_statement_cache_size)
+        if dialect_name != "postgresql" and any(option is not None for option in postgres_options):
+            raise ValueError(f"Postgres options set for a {dialect_name} database")
+
+
+DATABASE_PROFILES: Dict[str, DatabaseProfile] = {
+    # SQLAlchemy and driver defaults
+    "default": DatabaseProfile(),
+    # Log every statement
+    "development": DatabaseProfile(echo=True),
+    # File-backed SQLite with readers running alongside a writer
+    "sqlite-concurrent": DatabaseProfile(
+        sqlite_journal_mode="WAL",
+        sqlite_synchronous="NORMAL",
+        sqlite_busy_timeout_ms=5000,
+        sqlite_cache_size=-65536,
+        sqlite_mmap_size=268435456,
+    ),
+    # Postgres behind several API workers
+    "postgres-web": DatabaseProfile(
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=10,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        postgres_statement_timeout_ms=30000,
+        postgres_prepared_statement_cache_size=500,
+    ),
+}
+
+# asyncio driver used for each database backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Rewrite a database URL to use the backend's asyncio driver, e.g.
+    postgresql://... or postgresql+psycopg2://... -> postgresql+asyncpg://...
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgres":  # Heroku-style scheme
+        backend = "postgresql"
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Unsupported database backend: {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
 class Settings(BaseSettings):
     project_name: str = "Cycle Tracker"
     version: str = "1.0.0"
@@ -15,10 +122,88 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "sqlite:///./cycle_tracker.db"
-    async_database_url: str = database_url.replace("sqlite:", "sqlite+aiosqlite:")
+    # Derived from database_url (see to_async_url) unless set explicitly
+    async_database_url: Optional[str] = None
+    # Tuning profile from DATABASE_PROFILES, plus per-field overrides (JSON in the environment)
+    database_profile: str = "default"
+    database_profile_overrides: Dict[str, Any] = {}
+    # Schema handling on startup: "create", "migrate", "check" or "none" (see init_db)
+    database_schema: str = "create"
+    # Read replicas serving GET traffic (same tuning profile as the primary), and how long
+    # a user's reads stay on the primary after they commit a write
+    database_replica_urls: List[str] = []
+    read_your_writes_seconds: float = 5.0
+
+    # Password hashing pool ("thread" or "process")
+    password_pool_kind: str = "thread"
+    password_pool_workers: int = 4
+    password_pool_max_pending: int = 64
+
+    # How per-worker caches hear about other workers' writes: "local" (single worker only) or
+    # "postgres" (LISTEN/NOTIFY on invalidation_url, by default database_url)
+    invalidation_channel: str = "local"
+    invalidation_url: Optional[str] = None
+
+    # Authenticated-user cache
+    user_cache_enabled: bool = True
+    user_cache_ttl_seconds: float = 60.0
+    user_cache_max_entries: int = 10000
+
+    # Bulk period import
+    bulk_import_max_items: int = 5000
+    bulk_import_chunk_size: int = 500
+
+    # Buffered user bookkeeping (last_login): flush period, and buffered users that trigger an early flush
+    write_behind_interval_seconds: float = 5.0
+    write_behind_max_pending: int = 1000
+
+    # Days a deleted period's tombstone is kept for delta sync; older cursors must resync
+    period_tombstone_retention_days: int = 90
+
+    # Background jobs: concurrent jobs per worker, idle poll period, attempts and retry backoff
+    # (doubling per attempt), age after which a running job is presumed orphaned, shutdown grace
+    jobs_enabled: bool = True
+    jobs_concurrency: int = 2
+    jobs_poll_interval_seconds: float = 1.0
+    jobs_max_attempts: int = 3
+    jobs_retry_backoff_seconds: float = 2.0
+    jobs_stale_after_seconds: float = 900.0
+    jobs_shutdown_grace_seconds: float = 10.0
+
+    # User deletion: accounts with more periods are purged by a background job; rows deleted per transaction
+    user_delete_inline_max_periods: int = 1000
+    user_delete_chunk_size: int = 500
+
+    # Rows fetched per round trip when streaming exports
+    export_batch_size: int = 500
+
+    # Per-user response cache for dashboard reads: "memory", "none", or "package.module:factory"
+    # for a shared backend (see app.services.response_cache.build_backend), which may use the URL
+    response_cache_backend: str = "memory"
+    response_cache_url: Optional[str] = None
+    response_cache_ttl_seconds: float = 300.0
+    response_cache_max_entries: int = 10000
+
+    # Render responses with orjson
+    fast_json_responses: bool = False
 
     model_config = SettingsConfigDict()
 
+    @model_validator(mode="after")
+    def derive_async_database_url(self):
+        if self.async_database_url is None:
+            self.async_database_url = to_async_url(self.database_url)
+        return self
+
+    def database_tuning(self) -> DatabaseProfile:
+        """The selected tuning profile with overrides applied, validated."""
+        if self.database_profile not in DATABASE_PROFILES:
+            raise ValueError(
+                f"Unknown database_profile {self.database_profile!r}; choose one of {sorted(DATABASE_PROFILES)}"
+            )
+        base = DATABASE_PROFILES[self.database_profile].model_dump(exclude_defaults=True)
+        return DatabaseProfile.model_validate({**base, **self.database_profile_overrides})
+
 
 @lru_cache()
 def get_settings():
@@ -26,6 +211,7 @@ def get_settings():
     env_file_map = {
         "development": "dev.env",
         "testing": "test.env",
+        "testing-postgres": "test.postgres.env",
         "production": ".env",
     }
     app_env = os.getenv("APP_ENV", "production")  # Default to production
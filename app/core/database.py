@@ -1,36 +1,331 @@
-from sqlmodel import SQLModel, create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+import hashlib
+import hmac
+import time
+from contextvars import ContextVar
+from itertools import cycle
+from pathlib import Path
+from typing import List, Optional, Set
+from uuid import UUID
 
-from .config import get_settings
+from sqlmodel import SQLModel
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+
+from .cache import TTLCache, InvalidationChannel, invalidation_channel
+from .config import get_settings, DatabaseProfile, to_async_url
 
 settings = get_settings()
 
-# Database URL handling
-DATABASE_URL = settings.database_url
-ASYNC_DATABASE_URL = settings.async_database_url
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SCHEMA_MODES = ("create", "migrate", "check", "none")
+WRITE_TOPIC = "user_write"
+# Session.info key collecting the users whose data a transaction changed
+WRITTEN_USERS = "written_users"
+# Cookie telling any worker that the client wrote recently (see ReadRouter)
+READ_MARKER_COOKIE = "read_primary_until"
+# Users whose writes the current request committed, for ReadYourWritesMiddleware
+_request_writes: ContextVar[Optional[Set[UUID]]] = ContextVar("request_writes", default=None)
 
-# Synchronous engine and session maker
-sync_engine = create_engine(DATABASE_URL, echo=True)
-sync_session = sessionmaker(bind=sync_engine, expire_on_commit=False)
 
-# Asynchronous engine and session maker
-async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=True)
-async_session = sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+class Database:
+    """
+    Owns the application's single async engine. It is created on first use, so importing the
+    app opens no connections, and disposed by the lifespan on shutdown.
+    The tuning profile sets the pool options and is applied to each new connection.
+    """
 
+    def __init__(self, url: str, profile: Optional[DatabaseProfile] = None, profile_name: str = "custom"):
+        self.url = url
+        self.profile = profile or DatabaseProfile()
+        self.profile_name = profile_name
+        self._engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[async_sessionmaker] = None
+
+    @property
+    def dialect_name(self) -> str:
+        return make_url(self.url).get_backend_name()
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = create_async_engine(self.url, **self.profile.engine_options(self.dialect_name))
+            event.listen(self._engine.sync_engine, "connect", self._on_connect)
+        return self._engine
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # Postgres options travel as connect arguments instead (see DatabaseProfile.engine_options)
+            if self.dialect_name == "sqlite":
+                for pragma, value in self.profile.sqlite_pragmas().items():
+                    cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
+
+    async def validate(self):
+        """
+        Fail fast on a profile that doesn't fit the database: checked statically, then by
+        opening a connection so the connect hooks run once.
+        """
+        self.profile.validate_for(self.dialect_name)
+        async with self.engine.connect():
+            pass
+
+    async def describe(self) -> dict:
+        """Selected profile, pool state and the settings a live connection actually has."""
+        effective = {}
+        async with self.engine.connect() as conn:
+            if self.dialect_name == "sqlite":
+                for pragma in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size"):
+                    effective[pragma] = (await conn.exec_driver_sql(f"PRAGMA {pragma}")).scalar()
+            elif self.dialect_name == "postgresql":
+                effective["statement_timeout"] = (await conn.exec_driver_sql("SHOW statement_timeout")).scalar()
+        return {
+            "profile": self.profile_name,
+            "dialect": self.dialect_name,
+            "options": self.profile.model_dump(exclude_none=True),
+            "pool": self.engine.pool.status(),
+            "effective": effective,
+        }
+
+    @property
+    def session_factory(self) -> async_sessionmaker:
+        if self._session_factory is None:
+            self._session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        return self._session_factory
+
+    async def dispose(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            self._session_factory = None
+
+
+database = Database(
+    settings.async_database_url, profile=settings.database_tuning(), profile_name=settings.database_profile
+)
+
+
+class ReadRouter:
+    """
+    Hands out read-only sessions on the replicas, round-robin; without replicas reads use the primary.
+    After a client commits a write its reads stay on the primary for `sticky_seconds`, so it sees its
+    own writes despite replication lag. The client carries that window itself, as a signed marker
+    (see ReadYourWritesMiddleware), so it holds on whichever worker serves the next read. Writes are
+    also announced on the invalidation channel, which covers clients that drop cookies once the
+    channel reaches every worker.
+    """
+
+    def __init__(
+            self,
+            primary: Database,
+            replicas: List[Database],
+            sticky_seconds: float,
+            channel: InvalidationChannel,
+            secret: str,
+            max_entries: int = 10000,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self._secret = secret.encode()
+        self._replica_cycle = cycle(replicas)
+        self._recent_writers = TTLCache(max_entries=max_entries, ttl=sticky_seconds)
+        self.channel = channel
+        self.channel.subscribe(self._on_message)
+        self._routed = {"primary": 0, "replica": 0, "sticky": 0}
+
+    def mark_written(self, user_id: UUID):
+        self.channel.publish(WRITE_TOPIC, str(user_id))
+
+    def _on_message(self, topic: str, message: str):
+        if topic == WRITE_TOPIC:
+            self._recent_writers.set(UUID(message), True)
+
+    def _sign(self, expires: int) -> str:
+        return hmac.new(self._secret, f"{READ_MARKER_COOKIE}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+    def issue_marker(self) -> str:
+        """Marker keeping the holder's reads on the primary for the next `sticky_seconds`."""
+        expires = int(time.time() + self.sticky_seconds)
+        return f"{expires}.{self._sign(expires)}"
+
+    def marker_pins(self, marker: Optional[str]) -> bool:
+        """Whether `marker` is one of ours and still running."""
+        if not marker:
+            return False
+        expires, _, signature = marker.partition(".")
+        try:
+            expires = int(expires)
+        except ValueError:
+            return False
+        return expires >= time.time() and hmac.compare_digest(signature, self._sign(expires))
+
+    def database_for(self, user_id: Optional[UUID], marker: Optional[str] = None) -> Database:
+        if not self.replicas:
+            self._routed["primary"] += 1
+            return self.primary
+        if (user_id is not None and self._recent_writers.get(user_id) is not None) or self.marker_pins(marker):
+            self._routed["sticky"] += 1
+            return self.primary
+        self._routed["replica"] += 1
+        return next(self._replica_cycle)
+
+    def session(self, user_id: Optional[UUID] = None, marker: Optional[str] = None) -> AsyncSession:
+        return self.database_for(user_id, marker).session_factory()
+
+    async def validate(self):
+        for replica in self.replicas:
+            await replica.validate()
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.dispose()
+
+    def clear(self):
+        self._recent_writers.clear()
+
+    def stats(self) -> dict:
+        return {
+            "replicas": len(self.replicas),
+            "routed": dict(self._routed),
+            "sticky_users": len(self._recent_writers),
+            "sticky_seconds": self._recent_writers.ttl,
+        }
+
+
+read_router = ReadRouter(
+    database,
+    [
+        Database(to_async_url(url), profile=settings.database_tuning(), profile_name=settings.database_profile)
+        for url in settings.database_replica_urls
+    ],
+    sticky_seconds=settings.read_your_writes_seconds,
+    channel=invalidation_channel,
+    secret=settings.secret_key,
+)
 
-# Dependency for sync session
-def get_sync_session():
-    with sync_session() as session:
-        yield session
 
+def record_write(session: AsyncSession, user_id: UUID):
+    """Note that this transaction changes `user_id`'s data; their reads go to the primary once it commits."""
+    session.info.setdefault(WRITTEN_USERS, set()).add(user_id)
 
-# Dependency for async session
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session):
+    written = session.info.pop(WRITTEN_USERS, ())
+    for user_id in written:
+        read_router.mark_written(user_id)
+    request_writes = _request_writes.get()
+    if request_writes is not None:
+        request_writes.update(written)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Sets the ReadRouter marker cookie on responses to requests that committed a write, so the
+    client's next reads go to the primary whichever worker serves them. A no-op without replicas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not read_router.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        written: Set[UUID] = set()
+        token = _request_writes.set(written)
+
+        async def send_with_marker(message):
+            if message["type"] == "http.response.start" and written:
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{READ_MARKER_COOKIE}={read_router.issue_marker()}; HttpOnly; "
+                    f"Max-Age={int(read_router.sticky_seconds)}; Path=/; SameSite=lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_marker)
+        finally:
+            _request_writes.reset(token)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session):
+    session.info.pop(WRITTEN_USERS, None)
+
+
+def async_session() -> AsyncSession:
+    return database.session_factory()
+
+
+# Dependency for async session on the primary; use it for anything that writes
 async def get_async_session():
     async with async_session() as session:
         yield session
 
 
+get_write_session = get_async_session
+
+
+def _alembic_config(connection: Connection):
+    from alembic.config import Config
+
+    config = Config(str(PROJECT_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "migrations"))
+    config.attributes["connection"] = connection
+    # Keep the server's logging setup
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def _upgrade(connection: Connection):
+    from alembic import command
+
+    command.upgrade(_alembic_config(connection), "head")
+
+
+def _check_revision(connection: Connection):
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    heads = set(ScriptDirectory.from_config(_alembic_config(connection)).get_heads())
+    current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != heads:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected {sorted(heads)}; "
+            "run `alembic upgrade head`"
+        )
+
+
 # Initialize the database
-def init_db():
-    SQLModel.metadata.create_all(sync_engine)
+async def init_db(mode: Optional[str] = None):
+    """
+    Prepare the schema on startup, on the app's own async engine:
+    - create: create missing tables (local development)
+    - migrate: apply Alembic migrations up to head
+    - check: refuse to start unless the database is already at the head revision
+    - none: leave the schema alone
+    Defaults to the `database_schema` setting.
+    """
+    mode = mode or settings.database_schema
+    if mode not in SCHEMA_MODES:
+        raise ValueError(f"Unknown database_schema mode: {mode}")
+    if mode == "none":
+        return
+    # Make sure every table model is registered on the metadata
+    from app.models import calendar, data_version, job, period, symptoms, user  # noqa: F401
+
+    async with database.engine.begin() as conn:
+        if mode == "create":
+            await conn.run_sync(SQLModel.metadata.create_all)
+        elif mode == "migrate":
+            await conn.run_sync(_upgrade)
+        else:
+            await conn.run_sync(_check_revision)
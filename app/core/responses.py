@@ -0,0 +1,27 @@
+from typing import Any, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    # orjson handles UUID, date/datetime and enums itself; models are the only gap
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered by orjson, which encodes UUID, date/datetime and enum values natively
+    instead of running them through `jsonable_encoder` and `json.dumps`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def get_default_response_class(fast_json: bool) -> Type[JSONResponse]:
+    """App-wide response class: FastJSONResponse when enabled, FastAPI's JSONResponse otherwise."""
+    return FastJSONResponse if fast_json else JSONResponse
@@ -1,18 +1,48 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api import setup_routers
+from app.core.cache import invalidation_channel
 from app.core.config import get_settings
-from app.core.database import init_db
+from app.core.database import ReadYourWritesMiddleware, database, init_db, read_router
+from app.core.responses import get_default_response_class
+from app.core.security import password_pool
+from app.services.jobs import job_runner
+from app.services.write_behind import user_writes
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await database.validate()
+    await read_router.validate()
+    await init_db()
+    await invalidation_channel.start()
+    await user_writes.start()
+    if settings.jobs_enabled:
+        await job_runner.start()
+    yield
+    await job_runner.stop()
+    await user_writes.stop()
+    await invalidation_channel.stop()
+    password_pool.shutdown()
+    await read_router.dispose()
+    await database.dispose()
+
+
 app = FastAPI(
     title=settings.project_name,
     version=settings.version,
-    openapi_url=f"{settings.api_v1_str}/openapi.json"
+    openapi_url=f"{settings.api_v1_str}/openapi.json",
+    default_response_class=get_default_response_class(settings.fast_json_responses),
+    lifespan=lifespan
 )
 
+app.add_middleware(ReadYourWritesMiddleware)
+
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -23,8 +53,3 @@ app.add_middleware(
 )
 
 app = setup_routers(app)
-
-
-@app.on_event("startup")
-def on_startup():
-    init_db()
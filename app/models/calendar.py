@@ -0,0 +1,18 @@
+from datetime import date
+from uuid import UUID
+
+from sqlmodel import SQLModel, Field
+
+
+class PeriodDay(SQLModel, table=True):
+    """
+    One row per user and calendar day covered by a period, derived from the `period` table.
+    `intensity` uses the same 0/1/2 scale as the intensity-counts endpoint, and `period_id`
+    points at the period that won the day when several overlap.
+    """
+    __tablename__ = "period_day"
+
+    user_id: UUID = Field(foreign_key="user.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    intensity: int = Field(default=0)
+    period_id: UUID = Field(index=True)
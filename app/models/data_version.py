@@ -0,0 +1,18 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlmodel import SQLModel, Field
+
+
+class DataVersion(SQLModel, table=True):
+    """
+    Per-user counter bumped by every write that can change what the user reads back
+    (periods, symptoms, profile). ETags and Last-Modified are derived from it.
+    """
+    __tablename__ = "data_version"
+
+    user_id: UUID = Field(foreign_key="user.id", primary_key=True)
+    version: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    # Highest sync_version of the user's period tombstones that were pruned; older sync cursors are expired
+    pruned_through: int = Field(default=0)
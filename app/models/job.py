@@ -0,0 +1,40 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import Column, Index, JSON, Text
+from sqlmodel import SQLModel, Field
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(SQLModel, table=True):
+    """
+    A unit of deferred work run by the in-process JobRunner (see app.services.jobs).
+    Rows outlive the users they act on, so user_id is deliberately not a foreign key.
+    """
+    __tablename__ = "job"
+    __table_args__ = (
+        # Workers claim due jobs by status and run_after
+        Index("ix_job_status_run_after", "status", "run_after"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True, nullable=False)
+    kind: str = Field(max_length=64)
+    payload: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    user_id: Optional[UUID] = Field(default=None, index=True)
+    status: JobStatus = Field(default=JobStatus.PENDING)
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    run_after: datetime = Field(default_factory=datetime.now)
+    result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    error: Optional[str] = Field(default=None, sa_column=Column(Text))
+    created_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from uuid import UUID, uuid4
 from datetime import datetime, date
@@ -23,6 +24,13 @@ class PeriodBase(SQLModel):
 
 
 class Period(PeriodBase, table=True):
+    __table_args__ = (
+        # Every per-user query filters on user_id and orders/ranges on start_date
+        Index("ix_period_user_id_start_date", "user_id", "start_date"),
+        # Delta sync walks a user's rows in sync_version order
+        Index("ix_period_user_id_sync_version", "user_id", "sync_version"),
+    )
+
     id: Optional[UUID] = Field(
         default_factory=uuid4,
         primary_key=True,
@@ -34,9 +42,29 @@ class Period(PeriodBase, table=True):
         default_factory=datetime.now,
         sa_column_kwargs={"onupdate": datetime.now}
     )
+    # The user's data version of the write that last changed the row (see DataVersionService.bump);
+    # unlike updated_at it follows commit order, so delta sync can't skip a late commit
+    sync_version: int = Field(default=0)
 
     # Relationship to User
     user: User = Relationship(back_populates="periods")
 
-    # Relationship to Symptoms
-    symptoms: List[Symptom] = Relationship(back_populates="period", sa_relationship_kwargs={"lazy": "selectin"})
+    # Relationship to Symptoms. Never loaded implicitly: queries pick a loading profile
+    # (see PeriodService.load_options), and a forgotten one fails loudly instead of lazy loading
+    symptoms: List[Symptom] = Relationship(back_populates="period", sa_relationship_kwargs={"lazy": "raise_on_sql"})
+
+
+class PeriodTombstone(SQLModel, table=True):
+    """
+    Marker left behind by a deleted period so syncing clients learn about the delete.
+    """
+    __tablename__ = "period_tombstone"
+    __table_args__ = (
+        Index("ix_period_tombstone_user_id_deleted_at", "user_id", "deleted_at"),
+        Index("ix_period_tombstone_user_id_sync_version", "user_id", "sync_version"),
+    )
+
+    period_id: UUID = Field(primary_key=True)
+    user_id: UUID = Field(foreign_key="user.id")
+    deleted_at: datetime = Field(default_factory=datetime.now)
+    sync_version: int = Field(default=0)
@@ -4,7 +4,7 @@ from typing import Optional, List
 
 
 class SymptomBase(SQLModel):
-    period_id: UUID = Field(foreign_key="period.id")
+    period_id: UUID = Field(foreign_key="period.id", index=True)
     name: str
     intensity: Optional[str] = Field(default=None, max_length=100)
     notes: Optional[str] = Field(default=None, max_length=500)
@@ -27,6 +27,8 @@ class User(UserBase, table=True):
         sa_column_kwargs={"onupdate": datetime.now}
     )
     last_login: Optional[datetime] = Field(default=None)
+    # Bumped whenever previously issued tokens must stop working
+    token_version: int = Field(default=0)
     periods: list["Period"] = Relationship(back_populates="user")
 
 
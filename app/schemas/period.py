@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Optional, List, Any, Dict
 from uuid import UUID
 from enum import Enum
 
@@ -50,3 +50,28 @@ class PeriodResponse(PeriodCreate):
 class DateIntensityCount(BaseModel):
     date: date
     count: int
+
+
+class PeriodBulkCreate(BaseModel):
+    # Items are validated one by one so a bad entry doesn't reject the whole import
+    items: List[Dict[str, Any]]
+
+
+class BulkItemError(BaseModel):
+    index: int
+    errors: List[Dict[str, Any]]
+
+
+class PeriodBulkResult(BaseModel):
+    created: int
+    failed: int
+    ids: List[UUID] = []
+    errors: List[BulkItemError] = []
+
+
+class PeriodChanges(BaseModel):
+    """Changes since a sync cursor: created/updated periods and IDs of deleted ones."""
+    upserts: List[PeriodResponse] = []
+    deletes: List[UUID] = []
+    next_cursor: str
+    has_more: bool
@@ -53,4 +53,9 @@ class Token(BaseModel):
 
 
 class TokenData(BaseModel):
+    """Identity carried inside an access token"""
     email: str | None = None
+    id: UUID | None = None
+    is_superuser: bool = False
+    is_active: bool = True
+    token_version: int = 0
@@ -0,0 +1,222 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Date, Select, case, cast, func, literal, literal_column, true, type_coerce, insert, update, delete
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from uuid import UUID
+
+from app.models.calendar import PeriodDay
+from app.models.period import Period, FlowIntensity
+from app.services.jobs import job_runner
+
+
+class PeriodCalendar:
+    """
+    Keeps the derived `period_day` table in step with a user's periods.
+    Callers flush their period changes first and commit afterwards, so both land in one transaction.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @property
+    def dialect_name(self) -> str:
+        return self.db.bind.dialect.name
+
+    async def sync_period(
+            self,
+            user_id: UUID,
+            period_id: UUID,
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None
+    ):
+        """
+        Re-derive the days a period used to win and the days it covers now (`start_date`..`end_date`,
+        omitted for a deleted period).
+        """
+        result = await self.db.execute(
+            select(func.min(PeriodDay.day), func.max(PeriodDay.day))
+            .where(PeriodDay.user_id == user_id, PeriodDay.period_id == period_id)
+        )
+        old_first, old_last = result.one()
+        if old_first is not None:
+            await self.refresh(user_id, old_first, old_last)
+
+        if start_date is not None:
+            new_last = max(end_date or start_date, start_date)
+            if old_first is None or start_date < old_first or new_last > old_last:
+                await self.refresh(user_id, start_date, new_last)
+
+    async def refresh(self, user_id: UUID, first_day: date, last_day: date):
+        """
+        Recompute a user's days in [first_day, last_day] and write only the rows that differ.
+        """
+        days = expand_period_days(
+            self.dialect_name,
+            Period.user_id == user_id,
+            window_start=first_day,
+            window_end=last_day,
+        ).subquery()
+        result = await self.db.execute(select(days.c.day, days.c.count, days.c.period_id))
+        expected = {day: (count, period_id) for day, count, period_id in result.all()}
+
+        result = await self.db.execute(
+            select(PeriodDay.day, PeriodDay.intensity, PeriodDay.period_id)
+            .where(PeriodDay.user_id == user_id, PeriodDay.day >= first_day, PeriodDay.day <= last_day)
+        )
+        existing = {day: (intensity, period_id) for day, intensity, period_id in result.all()}
+
+        removed = [day for day in existing if day not in expected]
+        added = [
+            {"user_id": user_id, "day": day, "intensity": count, "period_id": period_id}
+            for day, (count, period_id) in expected.items() if day not in existing
+        ]
+        changed = [
+            {"user_id": user_id, "day": day, "intensity": count, "period_id": period_id}
+            for day, (count, period_id) in expected.items() if day in existing and existing[day] != (count, period_id)
+        ]
+
+        if removed:
+            await self.db.execute(
+                delete(PeriodDay).where(PeriodDay.user_id == user_id, PeriodDay.day.in_(removed))
+            )
+        if added:
+            await self.db.execute(insert(PeriodDay), added)
+        if changed:
+            await self.db.execute(update(PeriodDay), changed)
+
+    async def rebuild(self, user_id: Optional[UUID] = None) -> int:
+        """
+        Drop and re-derive the calendar for one user, or for everybody when `user_id` is None.
+        Used to backfill existing data. Returns the number of rows written.
+        """
+        criteria = [] if user_id is None else [Period.user_id == user_id]
+        delete_query = delete(PeriodDay)
+        if user_id is not None:
+            delete_query = delete_query.where(PeriodDay.user_id == user_id)
+        await self.db.execute(delete_query)
+
+        days = expand_period_days(self.dialect_name, *criteria).subquery()
+        await self.db.execute(
+            insert(PeriodDay).from_select(
+                ["user_id", "day", "intensity", "period_id"],
+                select(days.c.user_id, days.c.day, days.c.count, days.c.period_id),
+            )
+        )
+
+        count_query = select(func.count()).select_from(PeriodDay)
+        if user_id is not None:
+            count_query = count_query.where(PeriodDay.user_id == user_id)
+        result = await self.db.execute(count_query)
+        return result.scalar()
+
+
+def intensity_count(column):
+    """SQL expression mapping a flow intensity column to 0 (light/unset), 1 (medium) or 2 (heavy)."""
+    return case(
+        (column == FlowIntensity.MEDIUM, 1),
+        (column == FlowIntensity.HEAVY, 2),
+        else_=0,
+    )
+
+
+def expand_period_days(
+        dialect_name: str,
+        *criteria,
+        window_start: Optional[date] = None,
+        window_end: Optional[date] = None
+) -> Select:
+    """
+    Expand periods matching `criteria` into one row per (user_id, day), entirely in the database.
+    Days are generated with a recursive CTE on SQLite and `generate_series` on Postgres. Periods
+    without an end date cover their start day only; periods that overlap the window only partially
+    are clipped to it. When periods overlap, the one that started last wins.
+    Returns a select of (user_id, day, count, period_id).
+    """
+    postgres = dialect_name == "postgresql"
+    period_end = func.coalesce(Period.end_date, Period.start_date)
+    first_day = Period.start_date
+    last_day = period_end
+    criteria = [*criteria, period_end >= Period.start_date]
+    if window_start is not None:
+        window = literal(window_start, Date)
+        first_day = (func.greatest if postgres else func.max)(Period.start_date, window)
+        criteria.append(period_end >= window)
+    if window_end is not None:
+        window = literal(window_end, Date)
+        last_day = (func.least if postgres else func.min)(period_end, window)
+        criteria.append(Period.start_date <= window)
+
+    periods = (
+        select(
+            Period.id.label("period_id"),
+            Period.user_id,
+            Period.start_date,
+            first_day.label("first_day"),
+            last_day.label("last_day"),
+            intensity_count(Period.flow_intensity).label("count"),
+        )
+        .where(*criteria)
+        .cte("periods")
+    )
+
+    if postgres:
+        series = (
+            func.generate_series(periods.c.first_day, periods.c.last_day, literal_column("interval '1 day'"))
+            .table_valued("day")
+            .lateral()
+        )
+        days = select(
+            periods.c.user_id,
+            cast(series.c.day, Date).label("day"),
+            periods.c.count,
+            periods.c.start_date,
+            periods.c.period_id,
+        ).select_from(periods.join(series, true())).subquery()
+    else:
+        days = select(
+            periods.c.user_id,
+            periods.c.first_day.label("day"),
+            periods.c.last_day,
+            periods.c.count,
+            periods.c.start_date,
+            periods.c.period_id,
+        ).cte("days", recursive=True)
+        days = days.union_all(
+            select(
+                days.c.user_id,
+                func.date(days.c.day, "+1 day"),
+                days.c.last_day,
+                days.c.count,
+                days.c.start_date,
+                days.c.period_id,
+            ).where(days.c.day < days.c.last_day)
+        )
+
+    ranked = select(
+        days.c.user_id,
+        days.c.day,
+        days.c.count,
+        days.c.period_id,
+        func.row_number().over(
+            partition_by=(days.c.user_id, days.c.day),
+            order_by=(days.c.start_date.desc(), days.c.period_id.desc()),
+        ).label("rank"),
+    ).subquery()
+
+    return select(
+        ranked.c.user_id,
+        type_coerce(ranked.c.day, Date).label("day"),
+        ranked.c.count,
+        ranked.c.period_id,
+    ).where(ranked.c.rank == 1)
+
+
+@job_runner.register("rebuild_calendar")
+async def rebuild_calendar_job(session: AsyncSession, payload: dict) -> dict:
+    """Background form of `python -m app.cli rebuild-calendar`; payload may name a user_id."""
+    user_id = payload.get("user_id")
+    rows = await PeriodCalendar(session).rebuild(UUID(user_id) if user_id else None)
+    await session.commit()
+    return {"rows": rows}
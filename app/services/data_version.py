@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import select, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+from uuid import UUID
+
+from app.core.database import record_write
+from app.models.data_version import DataVersion
+
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class DataVersionService:
+    """
+    Reads and bumps a user's data version. Writers bump inside their own transaction,
+    before committing, so the version never runs ahead of or behind the data.
+    Reads are memoized on the session, so one request looks the version up at most once.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def _key(user_id: UUID) -> tuple:
+        return "data_version", user_id
+
+    async def get(self, user_id: UUID) -> Tuple[int, Optional[datetime]]:
+        """Current (version, updated_at); (0, None) for a user who never wrote anything."""
+        key = self._key(user_id)
+        if key not in self.db.info:
+            result = await self.db.execute(
+                select(DataVersion.version, DataVersion.updated_at).where(DataVersion.user_id == user_id)
+            )
+            row = result.one_or_none()
+            self.db.info[key] = (row.version, row.updated_at) if row else (0, None)
+        return self.db.info[key]
+
+    async def bump(self, user_id: UUID) -> int:
+        """
+        Increment the user's version and return the new value. The upsert keeps the row locked
+        until commit, so a user's writes get versions in the order they commit.
+        """
+        now = datetime.now()
+        upsert = UPSERTS[self.db.bind.dialect.name](DataVersion).values(user_id=user_id, version=1, updated_at=now)
+        result = await self.db.execute(upsert.on_conflict_do_update(
+            index_elements=[DataVersion.user_id],
+            set_={"version": DataVersion.version + 1, "updated_at": now},
+        ).returning(DataVersion.version))
+        self.db.info.pop(self._key(user_id), None)
+        record_write(self.db, user_id)
+        return result.scalar_one()
+
+    async def delete(self, user_id: UUID):
+        await self.db.execute(delete(DataVersion).where(DataVersion.user_id == user_id))
+        self.db.info.pop(self._key(user_id), None)
@@ -1,24 +1,84 @@
-from pydantic import BaseModel
-from sqlalchemy import func
-from typing import Type, List, Tuple, TypeVar, Generic, Any
-from fastapi import Query
+import base64
+import json
+from datetime import date, datetime
+from enum import Enum
+from uuid import UUID
+
+from fastapi import Query, HTTPException, Response, status
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Row, delete, func, literal, text, tuple_, update
+from typing import Type, List, Tuple, TypeVar, Generic, Any, Optional, Sequence
 from sqlmodel import select, SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 T = TypeVar("T")
 
 
+class TotalStrategy(str, Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
-    total: int
+    total: Optional[int] = None
     page: int
     limit: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
 
     @classmethod
-    def create(cls, data: List[T], total: int, page: int, limit: int):
-        total_pages = (total + limit - 1) // limit
-        return cls(items=data, total=total, page=page, limit=limit, total_pages=total_pages)
+    def create(
+            cls,
+            data: List[T],
+            total: Optional[int],
+            page: int,
+            limit: int,
+            next_cursor: Optional[str] = None,
+            total_strategy: TotalStrategy = TotalStrategy.EXACT
+    ):
+        return cls(**page_payload(data, total, page, limit, next_cursor, total_strategy))
+
+
+def page_payload(
+        data: List[Any],
+        total: Optional[int],
+        page: int,
+        limit: int,
+        next_cursor: Optional[str] = None,
+        total_strategy: TotalStrategy = TotalStrategy.EXACT
+) -> dict:
+    """Fields of a PaginatedResponse as a plain dict, for the lean (TypeAdapter) path."""
+    if total_strategy == TotalStrategy.NONE:
+        total = None
+    total_pages = None if total is None else (total + limit - 1) // limit
+    return {
+        "items": data,
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "total_pages": total_pages,
+        "total_is_estimate": total is not None and total_strategy == TotalStrategy.ESTIMATE,
+        "next_cursor": next_cursor,
+    }
+
+
+def lean_response(adapter: TypeAdapter, data: Any, headers: Optional[dict] = None) -> Response:
+    """
+    Validate plain row data once with a precompiled adapter and return it as JSON.
+    Returning a Response skips FastAPI's second validation pass against the response_model,
+    which stays on the route for the OpenAPI schema.
+    """
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(data)), media_type="application/json", headers=headers
+    )
+
+
+class PaginationMode(str, Enum):
+    OFFSET = "offset"
+    CURSOR = "cursor"
 
 
 class PaginationParams:
@@ -26,40 +86,175 @@ class PaginationParams:
             self,
             page: int = Query(1, ge=1, description="Page number (must be >= 1)"),
             limit: int = Query(10, ge=1, le=100, description="Number of items per page (1-100)"),
+            mode: PaginationMode = Query(PaginationMode.OFFSET, description="offset (page numbers) or cursor (keyset)"),
+            after: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+            total: Optional[TotalStrategy] = Query(
+                None, description="exact, estimate (planner statistics) or none; defaults to none in cursor mode"
+            ),
     ):
         self.page = page
         self.limit = limit
+        self.mode = PaginationMode.CURSOR if after is not None else mode
+        self.after = after
+        self.total = total
+
+    def total_strategy(self, default: TotalStrategy = TotalStrategy.EXACT) -> TotalStrategy:
+        """Requested total strategy, falling back to `default` (or none in cursor mode)."""
+        if self.total is not None:
+            return self.total
+        return TotalStrategy.NONE if self.cursor_mode else default
 
     @property
     def skip(self) -> int:
         """Calculate the offset for the database query."""
         return (self.page - 1) * self.limit
 
+    @property
+    def cursor_mode(self) -> bool:
+        return self.mode == PaginationMode.CURSOR
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque, URL-safe cursor for a row's sort-key values."""
+    raw = json.dumps([str(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """Turn a cursor back into typed values for `columns`."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        # encode_cursor only ever writes strings
+        if (
+            not isinstance(values, list)
+            or len(values) != len(columns)
+            or not all(isinstance(value, str) for value in values)
+        ):
+            raise ValueError("cursor does not match sort keys")
+        return [_parse_cursor_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+def _parse_cursor_value(column, value: str) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is UUID:
+        return UUID(value)
+    return python_type(value)
+
+
+async def count_query(query, db: AsyncSession) -> int:
+    count = select(func.count()).select_from(query.order_by(None).subquery())
+    result = await db.execute(count)
+    return result.scalar()
+
+
+async def estimate_query_rows(query, db: AsyncSession) -> Optional[int]:
+    """
+    Planner row estimate for `query`, without scanning it.
+    Only Postgres exposes one (EXPLAIN); other dialects return None.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return None
+    compiled = query.order_by(None).compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
 
 async def paginate_query(
-        query, db: AsyncSession, model: Type, pagination: PaginationParams
-) -> Tuple[List, int]:
+        query,
+        db: AsyncSession,
+        model: Type,
+        pagination: PaginationParams,
+        sort_keys: Optional[Sequence] = None,
+        default_total: TotalStrategy = TotalStrategy.EXACT,
+        as_rows: bool = False
+) -> Tuple[List, Optional[int], Optional[str], TotalStrategy]:
     """
-    Paginate a SQLAlchemy async query.
+    Paginate a SQLAlchemy async query, normally in a single round trip.
     - query: SQLAlchemy select query.
     - db: Async database session.
     - model: SQLAlchemy model.
-    - pagination: Pagination parameters (page, limit, skip).
+    - pagination: Pagination parameters (page, limit, skip, or cursor; total strategy).
+    - sort_keys: Columns giving a stable, unique order; required for cursor mode.
+    - default_total: Total strategy when the request doesn't pick one.
+    - as_rows: The query selects columns rather than an entity; items are returned as dicts.
     Returns:
     - List of items for the current page.
-    - Total count of all items in the query.
+    - Total count of all items in the query (None for the "none" strategy).
+    - Cursor for the next page (cursor mode only, None on the last page).
+    - The total strategy actually used: an estimate falls back to an exact count where the
+      database has no planner estimate.
+    Exact totals ride along in the page query: `count(*) OVER ()` in offset mode, a scalar
+    count subquery in cursor mode (where the keyset filter would otherwise shrink the window).
     """
-    # Execute count query
-    count_query = select(func.count()).select_from(query.subquery())
-    total = await db.execute(count_query)
-    total = total.scalar()
+    sort_keys = list(sort_keys) if sort_keys else [model.id]
+    strategy = pagination.total_strategy(default_total)
+    query = query.order_by(*sort_keys)
+    base_query = query
 
-    # Execute paginated query
-    paginated_query = query.offset(pagination.skip).limit(pagination.limit)
-    result = await db.execute(paginated_query)
-    items = result.scalars().all()
+    total = None
+    if strategy == TotalStrategy.ESTIMATE:
+        total = await estimate_query_rows(base_query, db)
+        if total is None:
+            strategy = TotalStrategy.EXACT
+    count_in_query = strategy == TotalStrategy.EXACT
 
-    return items, total
+    if not pagination.cursor_mode:
+        paginated_query = query.offset(pagination.skip).limit(pagination.limit)
+        if count_in_query:
+            paginated_query = paginated_query.add_columns(func.count().over().label("total_count"))
+        items, total = await _fetch_page(paginated_query, db, count_in_query, total, as_rows)
+        if count_in_query and not items and pagination.skip:
+            # Past the last page the window has no rows to report the total on
+            total = await count_query(base_query, db)
+        return items, total, None, strategy
+
+    # Keyset: continue strictly after the last row of the previous page
+    if pagination.after is not None:
+        values = decode_cursor(pagination.after, sort_keys)
+        query = query.where(
+            tuple_(*sort_keys) > tuple_(*[literal(value, key.type) for key, value in zip(sort_keys, values)])
+        )
+    paginated_query = query.limit(pagination.limit + 1)
+    if count_in_query:
+        total_column = select(func.count()).select_from(base_query.order_by(None).subquery()).scalar_subquery()
+        paginated_query = paginated_query.add_columns(total_column.label("total_count"))
+    items, total = await _fetch_page(paginated_query, db, count_in_query, total, as_rows)
+    if count_in_query and not items:
+        total = await count_query(base_query, db)
+
+    next_cursor = None
+    if len(items) > pagination.limit:
+        items = items[:pagination.limit]
+        last = items[-1]
+        next_cursor = encode_cursor([last[key.key] if as_rows else getattr(last, key.key) for key in sort_keys])
+    return items, total, next_cursor, strategy
+
+
+async def _fetch_page(
+        query, db: AsyncSession, with_total: bool, total: Optional[int], as_rows: bool = False
+) -> Tuple[List, Optional[int]]:
+    result = await db.execute(query)
+    if as_rows:
+        items = [dict(row) for row in result.mappings()]
+        if with_total:
+            total = items[0]["total_count"] if items else 0
+            for item in items:
+                del item["total_count"]
+        return items, total
+    if not with_total:
+        return result.scalars().all(), total
+    rows = result.all()
+    return [row[0] for row in rows], (rows[0][1] if rows else 0)
 
 
 class BaseCRUDService:
@@ -68,24 +263,52 @@ class BaseCRUDService:
         self.model = model
 
     async def get_paginated(
-            self, pagination: PaginationParams
+            self,
+            pagination: PaginationParams,
+            sort_keys: Optional[Sequence] = None,
+            default_total: TotalStrategy = TotalStrategy.EXACT,
+            profile: Any = None
     ) -> PaginatedResponse:
         """
         Get paginated results for a model.
         - db: Async SQLAlchemy database session.
         - pagination: Pagination parameters.
+        - sort_keys: Stable sort order (defaults to the primary key).
+        - default_total: Total strategy when the request doesn't pick one.
+        - profile: Loading profile, see `load_options`.
         Returns:
         - PaginatedResponse with items and pagination metadata.
         """
-        query = select(self.model)  # Build the select query for the model
-        items, total = await paginate_query(query, self.db, self.model, pagination)
+        query = select(self.model).options(*self.load_options(profile))  # Build the select query for the model
+        items, total, next_cursor, strategy = await paginate_query(
+            query, self.db, self.model, pagination, sort_keys, default_total
+        )
         return PaginatedResponse.create(
             data=items,
             total=total,
             page=pagination.page,
-            limit=pagination.limit
+            limit=pagination.limit,
+            next_cursor=next_cursor,
+            total_strategy=strategy
         )
 
+    async def get_paginated_rows(
+            self,
+            pagination: PaginationParams,
+            columns: Sequence,
+            sort_keys: Optional[Sequence] = None,
+            default_total: TotalStrategy = TotalStrategy.EXACT
+    ) -> dict:
+        """
+        Like `get_paginated`, but selects only `columns` and returns the page as plain dicts,
+        skipping ORM hydration; pair it with `lean_response`.
+        """
+        query = select(*columns)
+        items, total, next_cursor, strategy = await paginate_query(
+            query, self.db, self.model, pagination, sort_keys, default_total, as_rows=True
+        )
+        return page_payload(items, total, pagination.page, pagination.limit, next_cursor, strategy)
+
     async def create(self, obj_in: dict) -> T:
         """
         Create a new record.
@@ -96,11 +319,11 @@ class BaseCRUDService:
         await self.db.refresh(db_obj)
         return db_obj
 
-    async def get(self, obj_id: Any) -> T | None:
+    async def get(self, obj_id: Any, profile: Any = None) -> T | None:
         """
         Get a record by ID.
         """
-        query = select(self.model).where(self.model.id == obj_id)
+        query = select(self.model).where(self.model.id == obj_id).options(*self.load_options(profile))
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
@@ -134,9 +357,93 @@ class BaseCRUDService:
         """
         Delete a record.
         """
-        obj = await self.get(object_id)
-        if obj:
-            await self.db.delete(obj)
+        return await self.delete_where(self.model.id == object_id) is not None
+
+    async def get_owned(self, obj_id: Any, owner_id: Any, profile: Any = None) -> T | None:
+        """
+        Get a record by ID, only if it belongs to `owner_id`.
+        """
+        query = select(self.model).where(*self._owned(obj_id, owner_id)).options(*self.load_options(profile))
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def update_owned(self, obj_id: Any, owner_id: Any, obj_in, profile: Any = None) -> T | None:
+        """
+        Update a record owned by `owner_id`; None if it doesn't exist or isn't theirs.
+        """
+        return await self.update_where(*self._owned(obj_id, owner_id), obj_in=obj_in, profile=profile)
+
+    async def delete_owned(self, obj_id: Any, owner_id: Any) -> bool:
+        """
+        Delete a record owned by `owner_id`; False if it doesn't exist or isn't theirs.
+        """
+        return await self.delete_where(*self._owned(obj_id, owner_id)) is not None
+
+    async def update_where(self, *criteria, obj_in, profile: Any = None) -> T | None:
+        """
+        Update the record matching `criteria` with a single UPDATE ... RETURNING.
+        Returns the updated record, or None when nothing matched.
+        """
+        options = self.load_options(profile)
+        update_data = obj_in.model_dump(exclude_unset=True)
+        if not update_data:
+            result = await self.db.execute(select(self.model).where(*criteria).options(*options))
+            return result.scalar_one_or_none()
+
+        query = (
+            update(self.model)
+            .where(*criteria)
+            .values(**update_data)
+            .returning(self.model)
+            .options(*options)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        result = await self.db.execute(query)
+        db_obj = result.scalar_one_or_none()
+        if db_obj is not None:
+            await self._after_update(db_obj)
+            await self.db.commit()
+            await self._after_commit(db_obj)
+        return db_obj
+
+    async def delete_where(self, *criteria) -> Row | None:
+        """
+        Delete the record matching `criteria` with a single DELETE ... RETURNING.
+        Returns the deleted row's columns, or None when nothing matched.
+        """
+        await self._before_delete(*criteria)
+        query = (
+            delete(self.model)
+            .where(*criteria)
+            .returning(*self.model.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(query)
+        row = result.one_or_none()
+        if row is not None:
+            await self._after_delete(row)
             await self.db.commit()
-            return True
-        return False
+            await self._after_commit(row)
+        return row
+
+    def load_options(self, profile: Any = None) -> Sequence:
+        """
+        Loader options (selectinload/noload/load_only...) for a named loading profile.
+        Services with relationships override this; the default loads plain columns.
+        """
+        return ()
+
+    def _owned(self, obj_id: Any, owner_id: Any) -> tuple:
+        return self.model.id == obj_id, self.model.user_id == owner_id
+
+    async def _after_update(self, db_obj: T):
+        """Hook run inside the update transaction, before commit."""
+
+    async def _before_delete(self, *criteria):
+        """Hook run inside the delete transaction, before the DELETE (e.g. to remove dependent rows)."""
+
+    async def _after_delete(self, row: Row):
+        """Hook run inside the delete transaction, before commit."""
+
+    async def _after_commit(self, record: Any):
+        """Hook run once an update or delete has committed, with the updated record or deleted row."""
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator
+from uuid import UUID
+
+PERIOD_FIELDS = ["id", "start_date", "end_date", "flow_intensity", "notes", "created_at", "updated_at"]
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+async def to_ndjson(records: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """One JSON document per period, symptoms nested."""
+    async for record in records:
+        yield json.dumps(record, default=_json_default) + "\n"
+
+
+async def to_csv(records: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """One CSV row per period; symptoms are kept as a JSON array in the last column."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([*PERIOD_FIELDS, "symptoms"])
+    async for record in records:
+        writer.writerow([
+            *(_csv_value(record[field]) for field in PERIOD_FIELDS),
+            json.dumps(record["symptoms"], default=_json_default),
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, for an empty history
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+ENCODERS = {
+    ExportFormat.NDJSON: to_ndjson,
+    ExportFormat.CSV: to_csv,
+}
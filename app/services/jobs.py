@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import async_session
+from app.models.job import Job, JobStatus
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# handler(session, payload) -> optional JSON-able result; it commits its own work
+JobHandler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobRunner:
+    """
+    Runs deferred work from the `job` table on the event loop, at most `concurrency` jobs at a time.
+    Jobs are claimed with a compare-and-set on their status, so several workers can share the table.
+    Failed attempts are retried with exponential backoff until `max_attempts`; jobs left running by a
+    worker that died are picked up again once they are older than `stale_after` seconds (checked on
+    start and then every `stale_after` seconds by each running worker).
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], AsyncSession],
+            concurrency: int = 2,
+            poll_interval: float = 1.0,
+            max_attempts: int = 3,
+            retry_backoff: float = 2.0,
+            stale_after: float = 900.0,
+            shutdown_grace: float = 10.0,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.stale_after = stale_after
+        self.shutdown_grace = shutdown_grace
+        self._handlers: Dict[str, JobHandler] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._next_recovery = 0.0
+        self._stopping = False
+        self._counts = {"succeeded": 0, "retried": 0, "failed": 0}
+
+    def register(self, kind: str) -> Callable[[JobHandler], JobHandler]:
+        """Decorator registering the handler for a job kind."""
+
+        def decorator(handler: JobHandler) -> JobHandler:
+            self._handlers[kind] = handler
+            return handler
+
+        return decorator
+
+    async def enqueue(
+            self,
+            session: AsyncSession,
+            kind: str,
+            payload: Optional[Dict[str, Any]] = None,
+            user_id: Optional[UUID] = None,
+            max_attempts: Optional[int] = None,
+    ) -> Job:
+        """
+        Add a job to the caller's transaction; it becomes visible to the runner when the caller commits.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(kind=kind, payload=payload or {}, user_id=user_id, max_attempts=max_attempts or self.max_attempts)
+        session.add(job)
+        await session.flush()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def _claim(self) -> Optional[Job]:
+        now = datetime.now()
+        async with self.session_factory() as session:
+            candidates = await session.execute(
+                select(Job.id)
+                .where(Job.status == JobStatus.PENDING, Job.run_after <= now)
+                .order_by(Job.run_after)
+                .limit(self.concurrency)
+            )
+            for job_id in candidates.scalars():
+                claimed = await session.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == JobStatus.PENDING)
+                    .values(status=JobStatus.RUNNING, attempts=Job.attempts + 1, started_at=now)
+                )
+                await session.commit()
+                # Another worker got there first
+                if claimed.rowcount == 1:
+                    return await session.get(Job, job_id)
+        return None
+
+    async def _finish(self, job_id: UUID, **values):
+        async with self.session_factory() as session:
+            await session.execute(update(Job).where(Job.id == job_id).values(**values))
+            await session.commit()
+
+    async def _execute(self, job: Job):
+        handler = self._handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind {job.kind!r}")
+            async with self.session_factory() as session:
+                result = await handler(session, job.payload)
+        except asyncio.CancelledError:
+            # Shutdown: hand the attempt back so the job runs again
+            await self._finish(job.id, status=JobStatus.PENDING, attempts=job.attempts - 1, started_at=None)
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if handler is not None and job.attempts < job.max_attempts:
+                self._counts["retried"] += 1
+                delay = self.retry_backoff * 2 ** (job.attempts - 1)
+                logger.warning("Job %s (%s) attempt %d failed, retrying: %s", job.id, job.kind, job.attempts, error)
+                await self._finish(
+                    job.id, status=JobStatus.PENDING, error=error, run_after=datetime.now() + timedelta(seconds=delay)
+                )
+            else:
+                self._counts["failed"] += 1
+                logger.error("Job %s (%s) failed: %s", job.id, job.kind, error)
+                await self._finish(job.id, status=JobStatus.FAILED, error=error, finished_at=datetime.now())
+            return
+        self._counts["succeeded"] += 1
+        await self._finish(job.id, status=JobStatus.SUCCEEDED, result=result, error=None, finished_at=datetime.now())
+
+    async def recover_stale(self) -> int:
+        """Return jobs stuck in RUNNING (their worker died) to the queue."""
+        cutoff = datetime.now() - timedelta(seconds=self.stale_after)
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(Job)
+                .where(Job.status == JobStatus.RUNNING, Job.started_at < cutoff)
+                .values(status=JobStatus.PENDING, started_at=None)
+            )
+            await session.commit()
+        return result.rowcount
+
+    async def run_pending(self) -> int:
+        """Run every due job inline, one at a time; returns how many ran. For maintenance and tests."""
+        ran = 0
+        while (job := await self._claim()) is not None:
+            await self._execute(job)
+            ran += 1
+        return ran
+
+    async def _run_one(self, job: Job):
+        try:
+            await self._execute(job)
+        finally:
+            self._slots.release()
+            # A slot opened up: look for more work straight away
+            self._wakeup.set()
+
+    async def _recover_if_due(self):
+        if time.monotonic() < self._next_recovery:
+            return
+        self._next_recovery = time.monotonic() + self.stale_after
+        try:
+            if await self.recover_stale():
+                self._wakeup.set()
+        except Exception:
+            logger.exception("Recovering stale jobs failed")
+
+    async def _run(self):
+        while not self._stopping:
+            await self._recover_if_due()
+            await self._slots.acquire()
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Claiming a job failed")
+                job = None
+            if job is None:
+                self._slots.release()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            task = asyncio.create_task(self._run_one(job), name=f"job-{job.kind}-{job.id}")
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def start(self):
+        if self._task is None:
+            await self.recover_stale()
+            self._next_recovery = time.monotonic() + self.stale_after
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._wakeup = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="job-runner")
+
+    async def stop(self):
+        """Stop claiming jobs, give running ones `shutdown_grace` seconds, then requeue the rest."""
+        if self._task is None:
+            return
+        # Before Python 3.12, wait_for can swallow a cancellation that races its timeout; the flag
+        # still ends the loop then
+        self._stopping = True
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if self._running:
+            _, unfinished = await asyncio.wait(set(self._running), timeout=self.shutdown_grace)
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        self._task = None
+        self._slots = None
+        self._wakeup = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "concurrency": self.concurrency,
+            "in_flight": len(self._running),
+            "kinds": sorted(self._handlers),
+            **self._counts,
+        }
+
+
+job_runner = JobRunner(
+    session_factory=async_session,
+    concurrency=settings.jobs_concurrency,
+    poll_interval=settings.jobs_poll_interval_seconds,
+    max_attempts=settings.jobs_max_attempts,
+    retry_backoff=settings.jobs_retry_backoff_seconds,
+    stale_after=settings.jobs_stale_after_seconds,
+    shutdown_grace=settings.jobs_shutdown_grace_seconds,
+)
@@ -1,16 +1,88 @@
+import logging
 from datetime import datetime, timedelta
-from typing import Optional, List
+from enum import Enum
+from typing import Optional, List, Any, Dict, AsyncIterator
 
+from pydantic import TypeAdapter, ValidationError
+from fastapi import HTTPException, status
+from sqlalchemy import func, insert, literal, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import load_only, noload, selectinload
 from sqlmodel import select, delete
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from app.models.period import Period, FlowIntensity
+from app.core.config import get_settings
+from app.core.singleflight import SingleFlight
+
+from app.models.calendar import PeriodDay
+from app.models.data_version import DataVersion
+from app.models.period import Period, FlowIntensity, PeriodTombstone
 from app.models.symptoms import Symptom
-from app.schemas.period import DateIntensityCount, PeriodCreate, PeriodUpdate
-from app.services.db_services import PaginatedResponse, paginate_query, BaseCRUDService, PaginationParams
+from app.schemas.period import (
+    DateIntensityCount, PeriodCreate, PeriodUpdate, PeriodBulkResult, BulkItemError, PeriodChanges, PeriodResponse
+)
+from app.services.calendar import PeriodCalendar
+from app.services.data_version import DataVersionService
+from app.services.response_cache import response_cache
+from app.services.db_services import (
+    paginate_query, page_payload, BaseCRUDService, PaginationParams, encode_cursor, decode_cursor
+)
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# (De)serializers for cached reads; JSON is only used by shared cache backends
+RECENT_ADAPTER = TypeAdapter(Optional[PeriodResponse])
+INTENSITY_ADAPTER = TypeAdapter(List[DateIntensityCount])
+PAGE_ADAPTER = TypeAdapter(Dict[str, Any])
+
+# Sorts after every id: a sync position of (version, SYNC_ID_MAX) covers all rows of that version
+SYNC_ID_MAX = UUID(int=2 ** 128 - 1)
+
+# Identical dashboard reads in flight at the same time share one execution
+period_reads = SingleFlight()
+
+
+class LoadProfile(str, Enum):
+    """
+    How much of a period a query loads.
+    - full: every column plus symptoms (one extra IN query per page)
+    - summary: every column, symptoms left empty
+    - ids: primary key and owner only
+    - aggregate: the date range and intensity, for computations over many periods
+    """
+    FULL = "full"
+    SUMMARY = "summary"
+    IDS = "ids"
+    AGGREGATE = "aggregate"
+
+
+PROFILE_OPTIONS = {
+    LoadProfile.FULL: (selectinload(Period.symptoms),),
+    LoadProfile.SUMMARY: (noload(Period.symptoms),),
+    LoadProfile.IDS: (load_only(Period.id, Period.user_id), noload(Period.symptoms)),
+    LoadProfile.AGGREGATE: (
+        load_only(Period.id, Period.start_date, Period.end_date, Period.flow_intensity),
+        noload(Period.symptoms),
+    ),
+}
 
 
 class PeriodService(BaseCRUDService):
+    def load_options(self, profile: Optional[LoadProfile] = None):
+        return PROFILE_OPTIONS[profile or LoadProfile.FULL]
+
+    async def _cached(self, user_id: UUID, name: str, adapter: TypeAdapter, loader):
+        """
+        Serve a read through single-flight coalescing and the response cache, both keyed by the
+        user's current data version so a read never joins or reuses one from before a write.
+        """
+        version, _ = await DataVersionService(self.db).get(user_id)
+        return await period_reads.do(
+            (user_id, version, name),
+            lambda: response_cache.get_or_load(user_id, version, name, adapter, loader)
+        )
+
     async def create(self, obj_in: PeriodCreate) -> Period:
         """
         Create a new period with optional symptoms.
@@ -18,8 +90,9 @@ class PeriodService(BaseCRUDService):
         # Separate symptoms from period data
         symptoms_data = obj_in.pop('symptoms', [])
 
-        # Create the period
+        # Create the period, stamped with the version of this write
         db_obj = self.model(**obj_in)
+        db_obj.sync_version = await DataVersionService(self.db).bump(db_obj.user_id)
         self.db.add(db_obj)
         await self.db.flush()  # Flush to get the ID without committing
 
@@ -32,49 +105,317 @@ class PeriodService(BaseCRUDService):
                 )
                 self.db.add(symptom)
 
+        await self.db.flush()
+        await PeriodCalendar(self.db).sync_period(db_obj.user_id, db_obj.id, db_obj.start_date, db_obj.end_date)
         await self.db.commit()
-        await self.db.refresh(db_obj)
+        await response_cache.invalidate(db_obj.user_id)
+        # Symptoms were inserted directly, so load them onto the new period for the response
+        await self.db.refresh(db_obj, attribute_names=["symptoms"])
         return db_obj
 
+    async def bulk_create(self, user_id: UUID, items: List[Dict[str, Any]]) -> PeriodBulkResult:
+        """
+        Import many periods (with symptoms) for a user.
+        Items are validated in one pass; valid ones are written with multi-row INSERTs in
+        transactions of `bulk_import_chunk_size` items. Invalid items, and the items of a chunk
+        the database rejects, are reported by index instead of failing the whole import.
+        """
+        valid: List[tuple[int, PeriodCreate]] = []
+        errors: List[BulkItemError] = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, PeriodCreate.model_validate(item)))
+            except ValidationError as e:
+                errors.append(BulkItemError(
+                    index=index, errors=e.errors(include_url=False, include_context=False, include_input=False)
+                ))
+
+        ids: List[UUID] = []
+        chunk_size = settings.bulk_import_chunk_size
+        for offset in range(0, len(valid), chunk_size):
+            chunk = valid[offset:offset + chunk_size]
+            now = datetime.now()
+            period_rows = []
+            symptom_rows = []
+            for _, period in chunk:
+                period_id = uuid4()
+                period_rows.append({
+                    "id": period_id,
+                    "user_id": user_id,
+                    "start_date": period.start_date,
+                    "end_date": period.end_date,
+                    "flow_intensity": period.flow_intensity,
+                    "notes": period.notes,
+                    "created_at": now,
+                    "updated_at": now,
+                })
+                symptom_rows.extend(
+                    {"id": uuid4(), "period_id": period_id, **symptom.model_dump()}
+                    for symptom in period.symptoms or []
+                )
+
+            try:
+                sync_version = await DataVersionService(self.db).bump(user_id)
+                for row in period_rows:
+                    row["sync_version"] = sync_version
+                await self.db.execute(insert(self.model), period_rows)
+                if symptom_rows:
+                    await self.db.execute(insert(Symptom), symptom_rows)
+                first_day = min(period.start_date for _, period in chunk)
+                last_day = max(max(period.end_date or period.start_date, period.start_date) for _, period in chunk)
+                await PeriodCalendar(self.db).refresh(user_id, first_day, last_day)
+                await self.db.commit()
+                await response_cache.invalidate(user_id)
+            except SQLAlchemyError:
+                await self.db.rollback()
+                # Driver messages carry SQL, constraint names and values: keep them in the server log
+                logger.exception(
+                    "Bulk import chunk of %d periods for user %s rejected by the database", len(chunk), user_id
+                )
+                errors.extend(
+                    BulkItemError(
+                        index=index, errors=[{"type": "database_error", "msg": "The database rejected the batch containing this item"}]
+                    )
+                    for index, _ in chunk
+                )
+                continue
+            ids.extend(row["id"] for row in period_rows)
+
+        errors.sort(key=lambda error: error.index)
+        return PeriodBulkResult(created=len(ids), failed=len(errors), ids=ids, errors=errors)
+
     async def update(self, db_obj: Period, obj_in: PeriodUpdate) -> Period:
         """
         Update a period
         """
-        # Update period base fields
-        obj_data = db_obj.model_dump()
-        update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        return await self.update_where(self.model.id == db_obj.id, obj_in=obj_in, profile=LoadProfile.FULL)
 
-        self.db.add(db_obj)
-        await self.db.commit()
-        await self.db.refresh(db_obj)
-        return db_obj
+    async def _after_update(self, db_obj: Period):
+        # Bump first: it locks the user's data version row, serializing their calendar rewrites
+        db_obj.sync_version = await DataVersionService(self.db).bump(db_obj.user_id)
+        await PeriodCalendar(self.db).sync_period(db_obj.user_id, db_obj.id, db_obj.start_date, db_obj.end_date)
+
+    async def _before_delete(self, *criteria):
+        # Symptoms reference the period, so they go first, in the same transaction
+        await self.db.execute(
+            delete(Symptom).where(Symptom.period_id.in_(select(self.model.id).where(*criteria)))
+        )
+
+    async def _after_delete(self, row):
+        # Taken before the calendar is touched, as in _after_update
+        sync_version = await DataVersionService(self.db).bump(row.user_id)
+        # Release the calendar days the period covered
+        await PeriodCalendar(self.db).sync_period(row.user_id, row.id)
+        # Leave a tombstone so syncing clients learn about the delete
+        self.db.add(PeriodTombstone(period_id=row.id, user_id=row.user_id, sync_version=sync_version))
+        await self.prune_tombstones(row.user_id)
+
+    async def _after_commit(self, record):
+        # Cached reads are keyed on the data version, so this only frees them early
+        await response_cache.invalidate(record.user_id)
+
+    async def get_changes(self, user_id: UUID, since: Optional[str], limit: int) -> PeriodChanges:
+        """
+        Periods created/updated and deleted after the `since` cursor (everything when omitted).
+        Rows are ordered by sync_version, which follows commit order, so a write that commits
+        late can't fall behind a cursor. The cursor holds two keyset positions, (sync_version, id)
+        over periods and (sync_version, period_id) over tombstones; a position whose stream is
+        exhausted moves up to the data version read first, covering everything committed by then.
+        Raises 410 when tombstones the cursor hasn't seen were pruned.
+        """
+        cursor_columns = (self.model.sync_version, self.model.id, PeriodTombstone.sync_version, PeriodTombstone.period_id)
+        if since is None:
+            position = [-1, UUID(int=0), -1, UUID(int=0)]
+        else:
+            position = decode_cursor(since, cursor_columns)
+
+        result = await self.db.execute(
+            select(DataVersion.version, DataVersion.pruned_through).where(DataVersion.user_id == user_id)
+        )
+        version, pruned_through = result.one_or_none() or (0, 0)
+        if since is not None and position[2] < pruned_through:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Sync cursor predates pruned deletes; start a full sync without `since`"
+            )
+
+        def after(columns, values):
+            return tuple_(*columns) > tuple_(*[literal(value, column.type) for column, value in zip(columns, values)])
+
+        query = (
+            select(self.model)
+            .options(*self.load_options(LoadProfile.FULL))
+            .where(self.model.user_id == user_id, after(cursor_columns[:2], position[:2]))
+            .order_by(self.model.sync_version, self.model.id)
+            .limit(limit + 1)
+        )
+        result = await self.db.execute(query)
+        upserts = result.scalars().all()
+
+        query = (
+            select(PeriodTombstone.sync_version, PeriodTombstone.period_id)
+            .where(PeriodTombstone.user_id == user_id, after(cursor_columns[2:], position[2:]))
+            .order_by(PeriodTombstone.sync_version, PeriodTombstone.period_id)
+            .limit(limit + 1)
+        )
+        result = await self.db.execute(query)
+        deletes = result.all()
+
+        more_upserts, more_deletes = len(upserts) > limit, len(deletes) > limit
+        upserts, deletes = upserts[:limit], deletes[:limit]
+        if more_upserts:
+            position[:2] = [upserts[-1].sync_version, upserts[-1].id]
+        else:
+            position[:2] = [max(version, upserts[-1].sync_version if upserts else -1, position[0]), SYNC_ID_MAX]
+        if more_deletes:
+            position[2:] = [deletes[-1].sync_version, deletes[-1].period_id]
+        else:
+            position[2:] = [max(version, deletes[-1].sync_version if deletes else -1, position[2]), SYNC_ID_MAX]
+
+        return PeriodChanges.model_validate({
+            "upserts": upserts,
+            "deletes": [row.period_id for row in deletes],
+            "next_cursor": encode_cursor(position),
+            "has_more": more_upserts or more_deletes,
+        }, from_attributes=True)
+
+    async def prune_tombstones(self, user_id: UUID) -> int:
+        """
+        Drop a user's tombstones older than `period_tombstone_retention_days` and record the highest
+        pruned sync_version, so cursors from before it get a 410 instead of silently missing deletes.
+        Runs inside the caller's transaction.
+        """
+        cutoff = datetime.now() - timedelta(days=settings.period_tombstone_retention_days)
+        result = await self.db.execute(
+            select(func.max(PeriodTombstone.sync_version))
+            .where(PeriodTombstone.user_id == user_id, PeriodTombstone.deleted_at < cutoff)
+        )
+        pruned_through = result.scalar()
+        if pruned_through is None:
+            return 0
+        result = await self.db.execute(
+            delete(PeriodTombstone)
+            .where(PeriodTombstone.user_id == user_id, PeriodTombstone.sync_version <= pruned_through)
+        )
+        await self.db.execute(
+            update(DataVersion)
+            .where(DataVersion.user_id == user_id, DataVersion.pruned_through < pruned_through)
+            .values(pruned_through=pruned_through)
+        )
+        return result.rowcount
 
     async def get_user_periods(
         self,
         user_id: UUID,
-        pagination: PaginationParams
-    ) -> PaginatedResponse:
+        pagination: PaginationParams,
+        profile: LoadProfile = LoadProfile.FULL
+    ) -> dict:
         """
         Get periods for a specific user with pagination.
+        Pages are read as plain column rows (no ORM instances), with symptoms for the whole
+        page fetched in one extra IN query under the full profile; pair with `lean_response`.
+        First pages are served from the response cache.
+        """
+        if pagination.page == 1 and pagination.after is None:
+            name = ":".join([
+                "periods", profile.value, pagination.mode.value, str(pagination.limit),
+                pagination.total_strategy().value
+            ])
+            return await self._cached(
+                user_id, name, PAGE_ADAPTER, lambda: self._load_user_periods(user_id, pagination, profile)
+            )
+        return await self._load_user_periods(user_id, pagination, profile)
+
+    async def _load_user_periods(self, user_id: UUID, pagination: PaginationParams, profile: LoadProfile) -> dict:
+        query = select(*self.model.__table__.columns).where(self.model.user_id == user_id)
+        items, total, next_cursor, strategy = await paginate_query(
+            query, self.db, self.model, pagination,
+            sort_keys=(self.model.start_date, self.model.id), as_rows=True
+        )
+        for item in items:
+            item["symptoms"] = []
+        if items and profile == LoadProfile.FULL:
+            by_period = {item["id"]: item for item in items}
+            result = await self.db.execute(
+                select(*Symptom.__table__.columns).where(Symptom.period_id.in_(by_period))
+            )
+            for symptom in result.mappings():
+                by_period[symptom["period_id"]]["symptoms"].append(dict(symptom))
+        return page_payload(items, total, pagination.page, pagination.limit, next_cursor, strategy)
+
+    async def stream_user_history(self, user_id: UUID) -> AsyncIterator[dict]:
         """
-        query = select(self.model).where(self.model.user_id == user_id)
-        items, total = await paginate_query(query, self.db, self.model, pagination)
-        return PaginatedResponse.create(
-            data=items,
-            total=total,
-            page=pagination.page,
-            limit=pagination.limit
+        Yield every period of a user as a plain dict with its symptoms, oldest first.
+        Rows come from a single period/symptom join read through a server-side cursor in
+        batches of `export_batch_size`, so memory stays flat regardless of history size.
+        """
+        query = (
+            select(
+                self.model.id,
+                self.model.start_date,
+                self.model.end_date,
+                self.model.flow_intensity,
+                self.model.notes,
+                self.model.created_at,
+                self.model.updated_at,
+                Symptom.id.label("symptom_id"),
+                Symptom.name.label("symptom_name"),
+                Symptom.intensity.label("symptom_intensity"),
+                Symptom.notes.label("symptom_notes"),
+            )
+            .outerjoin(Symptom, Symptom.period_id == self.model.id)
+            .where(self.model.user_id == user_id)
+            .order_by(self.model.start_date, self.model.id)
+            # stream_results uses a server-side cursor where the driver has one (asyncpg)
+            .execution_options(yield_per=settings.export_batch_size, stream_results=True)
         )
+        result = await self.db.stream(query)
 
-    async def get_recent_period(self, user_id: UUID) -> Optional[Period]:
+        record = None
+        async for row in result:
+            if record is None or record["id"] != row.id:
+                if record is not None:
+                    yield record
+                record = {
+                    "id": row.id,
+                    "start_date": row.start_date,
+                    "end_date": row.end_date,
+                    "flow_intensity": row.flow_intensity,
+                    "notes": row.notes,
+                    "created_at": row.created_at,
+                    "updated_at": row.updated_at,
+                    "symptoms": [],
+                }
+            if row.symptom_id is not None:
+                record["symptoms"].append({
+                    "id": row.symptom_id,
+                    "name": row.symptom_name,
+                    "intensity": row.symptom_intensity,
+                    "notes": row.symptom_notes,
+                })
+        if record is not None:
+            yield record
+
+    async def get_recent_period(
+        self, user_id: UUID, profile: LoadProfile = LoadProfile.FULL
+    ) -> Optional[Period | PeriodResponse]:
         """
         Get the most recent period for a user.
+        Full-profile lookups go through the response cache and come back as a PeriodResponse.
         """
+        if profile != LoadProfile.FULL:
+            return await self._load_recent_period(user_id, profile)
+
+        async def load():
+            return RECENT_ADAPTER.validate_python(
+                await self._load_recent_period(user_id, profile), from_attributes=True
+            )
+        return await self._cached(user_id, "recent", RECENT_ADAPTER, load)
+
+    async def _load_recent_period(self, user_id: UUID, profile: LoadProfile) -> Optional[Period]:
         query = (
             select(self.model)
+            .options(*self.load_options(profile))
             .where(self.model.user_id == user_id)
             .order_by(self.model.start_date.desc())
             .limit(1)
@@ -90,45 +431,23 @@ class PeriodService(BaseCRUDService):
         1 for medium intensity
         2 for high intensity
         """
-        # Calculate date one year ago from today
-        one_year_ago = datetime.now().date() - timedelta(days=365)
+        # The window moves daily, so the day is part of the cache key
+        today = datetime.now().date()
+        return await self._cached(
+            user_id, f"intensity-counts:{today}", INTENSITY_ADAPTER,
+            lambda: self._load_period_intensity_counts(user_id, today)
+        )
 
-        # Query to get all periods in the last year
+    async def _load_period_intensity_counts(self, user_id: UUID, today) -> List[DateIntensityCount]:
+        one_year_ago = today - timedelta(days=365)
+
+        # Days are pre-expanded into period_day, so this is a single range scan on its primary key
         query = (
-            select(self.model)
-            .where(
-                self.model.user_id == user_id,
-                self.model.start_date >= one_year_ago
-            )
-            .order_by(self.model.start_date)
+            select(PeriodDay.day, PeriodDay.intensity)
+            .where(PeriodDay.user_id == user_id, PeriodDay.day >= one_year_ago)
+            .order_by(PeriodDay.day)
         )
 
         result = await self.db.execute(query)
-        periods = result.scalars().all()
-
-        # Dictionary to store date counts
-        date_counts = {}
-
-        for period in periods:
-            # Convert flow intensity to count
-            intensity_count = {
-                FlowIntensity.LIGHT: 0,
-                FlowIntensity.MEDIUM: 1,
-                FlowIntensity.HEAVY: 2
-            }.get(period.flow_intensity, 0)
-
-            if period.end_date is None:
-                # If no end date, just add the start date
-                date_counts[period.start_date] = intensity_count
-            else:
-                # For each day in the period, add to the dictionary
-                current_date = period.start_date
-                while current_date <= period.end_date:
-                    date_counts[current_date] = intensity_count
-                    current_date += timedelta(days=1)
-
-        # Convert dictionary to list of DateIntensityCount objects
-        return [
-            DateIntensityCount(date=date, count=count)
-            for date, count in sorted(date_counts.items())
-        ]
+        return [DateIntensityCount(date=day, count=count) for day, count in result.all()]
+
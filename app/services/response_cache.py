@@ -0,0 +1,155 @@
+import importlib
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Hashable, Optional
+from uuid import UUID
+
+from pydantic import TypeAdapter
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+
+settings = get_settings()
+
+MISSING = object()
+
+
+class ResponseCacheBackend(ABC):
+    """
+    Storage behind `ResponseCache`. Keys are (user_id, data_version, name) tuples.
+    Shared backends (`shared = True`) hold JSON bytes so other workers can read them;
+    in-process backends hold the Python values themselves.
+
+    To share the cache between workers (e.g. through Redis or memcached), subclass this with
+    `shared = True`, keep an index of each user's keys so `invalidate` can drop them together,
+    and select it with `response_cache_backend` (see `build_backend`).
+    """
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: tuple) -> Any:
+        """The stored value, or MISSING."""
+
+    @abstractmethod
+    async def set(self, key: tuple, value: Any):
+        """Store a value."""
+
+    @abstractmethod
+    async def invalidate(self, user_id: UUID):
+        """Drop every entry of a user."""
+
+    @abstractmethod
+    def clear(self):
+        """Drop every entry this process can."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryBackend(ResponseCacheBackend):
+    """Per-process LRU with TTL."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._cache = TTLCache(max_entries=max_entries, ttl=ttl)
+
+    async def get(self, key: tuple) -> Any:
+        # Values are boxed so a cached None is told apart from a miss
+        entry = self._cache.get(key)
+        return MISSING if entry is None else entry[0]
+
+    async def set(self, key: tuple, value: Any):
+        self._cache.set(key, (value,))
+
+    async def invalidate(self, user_id: UUID):
+        self._cache.delete_where(lambda key: key[0] == user_id)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        return {"entries": stats["entries"], "max_entries": stats["max_entries"], "evictions": stats["evictions"]}
+
+
+class ResponseCache:
+    """
+    Per-user cache for read endpoints. Keys include the user's data version, so a write
+    makes older entries unreachable even on workers that never saw it; `invalidate` only
+    frees their space early.
+    """
+
+    def __init__(self, backend: Optional[ResponseCacheBackend]):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get_or_load(
+            self,
+            user_id: UUID,
+            version: int,
+            name: Hashable,
+            adapter: TypeAdapter,
+            loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Cached value for `name`, or `loader()`'s result, stored for next time.
+        `adapter` (de)serializes values for shared backends.
+        """
+        if not self.enabled:
+            return await loader()
+        key = (user_id, version, name)
+        value = await self.backend.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return adapter.validate_json(value) if self.backend.shared else value
+
+        self.misses += 1
+        value = await loader()
+        await self.backend.set(key, adapter.dump_json(value) if self.backend.shared else value)
+        return value
+
+    async def invalidate(self, user_id: UUID):
+        if self.enabled:
+            await self.backend.invalidate(user_id)
+
+    def clear(self):
+        self.hits = self.misses = 0
+        if self.enabled:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"backend": "none"}
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            **self.backend.stats(),
+        }
+
+
+def build_backend(kind: str) -> Optional[ResponseCacheBackend]:
+    """
+    "none", "memory", or "package.module:factory" for a backend of your own: the factory is
+    called with the settings (`response_cache_url`, `response_cache_ttl_seconds`...) and returns
+    a ResponseCacheBackend.
+    """
+    if kind == "none":
+        return None
+    if kind == "memory":
+        return MemoryBackend(
+            max_entries=settings.response_cache_max_entries, ttl=settings.response_cache_ttl_seconds
+        )
+    module_name, _, factory_name = kind.partition(":")
+    if not factory_name:
+        raise ValueError(f"Unknown response cache backend: {kind}")
+    backend = getattr(importlib.import_module(module_name), factory_name)(settings)
+    if not isinstance(backend, ResponseCacheBackend):
+        raise TypeError(f"{kind} returned {type(backend).__name__}, not a ResponseCacheBackend")
+    return backend
+
+
+response_cache = ResponseCache(build_backend(settings.response_cache_backend))
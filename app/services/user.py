@@ -1,16 +1,28 @@
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import func
+from sqlalchemy import func, delete
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette import status
 from starlette.exceptions import HTTPException
 
-from app.core.security import pwd_context
+from app.core.config import get_settings
+from app.core.security import verify_password_async, get_password_hash_async
+from app.models.calendar import PeriodDay
+from app.models.job import Job
+from app.models.period import Period, PeriodTombstone
+from app.models.symptoms import Symptom
 from app.models.user import User, UserRead
 from app.schemas.user import UserCreate, PasswordChange, UserUpdate
-from app.services.db_services import PaginationParams, PaginatedResponse, BaseCRUDService
+from app.services.data_version import DataVersionService
+from app.services.db_services import PaginationParams, BaseCRUDService, TotalStrategy
+from app.services.jobs import job_runner
+from app.services.response_cache import response_cache
+from app.services.user_cache import user_cache, auth_states
+
+settings = get_settings()
 
 
 class UserService():
@@ -18,6 +30,12 @@ class UserService():
         self.db = db
         self.crud_service = BaseCRUDService(self.db, User)
 
+    @staticmethod
+    def _invalidate(user_id: UUID):
+        """Drop cached copies of the user, including the state token checks rely on, on all workers."""
+        user_cache.invalidate(user_id)
+        auth_states.invalidate(user_id)
+
     async def get_by_email(self, email: str) -> User | None:
         statement = select(User).where(User.email == email)
         result = await self.db.execute(statement)
@@ -27,7 +45,7 @@ class UserService():
         return await self.crud_service.get(user_id)
 
     async def create(self, user_create: UserCreate) -> User:
-        hashed_password = pwd_context.hash(user_create.password)
+        hashed_password = await get_password_hash_async(user_create.password)
 
         db_user = User(
             email=user_create.email,
@@ -52,13 +70,23 @@ class UserService():
 
         update_data = user_update.model_dump(exclude_unset=True)
 
+        # Role or activation changes must not keep working through old token claims
+        revoke_tokens = (
+            update_data.get("is_active", db_user.is_active) != db_user.is_active
+            or update_data.get("is_superuser", db_user.is_superuser) != db_user.is_superuser
+        )
+
         for field, value in update_data.items():
             setattr(db_user, field, value)
 
+        if revoke_tokens:
+            db_user.token_version += 1
         db_user.updated_at = datetime.now()
         self.db.add(db_user)
+        await DataVersionService(self.db).bump(db_user.id)
         await self.db.commit()
         await self.db.refresh(db_user)
+        self._invalidate(db_user.id)
         return db_user
 
     async def change_password(self, user_id: UUID, password_change: PasswordChange) -> bool:
@@ -70,18 +98,20 @@ class UserService():
             )
 
         # Verify current password
-        if not pwd_context.verify(password_change.current_password, db_user.hashed_password):
+        if not await verify_password_async(password_change.current_password, db_user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Incorrect password"
             )
 
         # Update password
-        db_user.hashed_password = pwd_context.hash(password_change.new_password)
+        db_user.hashed_password = await get_password_hash_async(password_change.new_password)
+        db_user.token_version += 1
         db_user.updated_at = datetime.now()
 
         self.db.add(db_user)
         await self.db.commit()
+        self._invalidate(db_user.id)
         return True
 
     async def change_password_admin(self, user_id: UUID, password_change: PasswordChange) -> bool:
@@ -93,14 +123,21 @@ class UserService():
             )
 
         # Update password
-        db_user.hashed_password = pwd_context.hash(password_change.new_password)
+        db_user.hashed_password = await get_password_hash_async(password_change.new_password)
+        db_user.token_version += 1
         db_user.updated_at = datetime.now()
 
         self.db.add(db_user)
         await self.db.commit()
+        self._invalidate(db_user.id)
         return True
 
-    async def delete(self, user_id: UUID) -> bool:
+    async def delete(self, user_id: UUID, requested_by: Optional[UUID] = None) -> Optional[Job]:
+        """
+        Delete a user and everything they own. The account is deactivated (and its tokens revoked)
+        straight away; accounts with more than `user_delete_inline_max_periods` periods are then
+        purged by a background job, which is returned. Otherwise the purge runs here and None is returned.
+        """
         db_user = await self.get_by_id(user_id)
         if not db_user:
             raise HTTPException(
@@ -108,12 +145,75 @@ class UserService():
                 detail="User not found"
             )
 
-        await self.db.delete(db_user)
+        db_user.is_active = False
+        db_user.token_version += 1
+        self.db.add(db_user)
+        # Only needs to know whether the limit is exceeded, so count at most limit + 1 rows
+        limit = settings.user_delete_inline_max_periods
+        sample = select(Period.id).where(Period.user_id == user_id).limit(limit + 1).subquery()
+        periods = (await self.db.execute(select(func.count()).select_from(sample))).scalar_one()
+        job = None
+        if periods > limit:
+            job = await job_runner.enqueue(self.db, "delete_user", {"user_id": str(user_id)}, user_id=requested_by)
         await self.db.commit()
-        return True
+        self._invalidate(db_user.id)
+
+        if job is None:
+            await self.purge(user_id)
+        return job
+
+    async def _delete_chunks(self, column, *where) -> int:
+        """
+        DELETE the rows matching `where`, `user_delete_chunk_size` keys (`column`) per transaction,
+        so no single statement holds write locks for long.
+        """
+        deleted = 0
+        while True:
+            keys = (await self.db.execute(
+                select(column).where(*where).limit(settings.user_delete_chunk_size)
+            )).scalars().all()
+            if not keys:
+                return deleted
+            await self.db.execute(delete(column.class_).where(*where, column.in_(keys)))
+            await self.db.commit()
+            deleted += len(keys)
+
+    async def purge(self, user_id: UUID) -> dict:
+        """
+        Remove a user's rows with set-based, chunked DELETEs (children first, so it works with
+        enforced foreign keys), then the user. Safe to re-run after a partial failure.
+        """
+        user_periods = select(Period.id).where(Period.user_id == user_id)
+        counts = {
+            "symptoms": await self._delete_chunks(Symptom.id, Symptom.period_id.in_(user_periods)),
+            "periods": await self._delete_chunks(Period.id, Period.user_id == user_id),
+            "period_days": await self._delete_chunks(PeriodDay.day, PeriodDay.user_id == user_id),
+            "tombstones": await self._delete_chunks(
+                PeriodTombstone.period_id, PeriodTombstone.user_id == user_id
+            ),
+        }
+        await DataVersionService(self.db).delete(user_id)
+        await self.db.execute(delete(User).where(User.id == user_id))
+        await self.db.commit()
+        await response_cache.invalidate(user_id)
+        return counts
 
     async def get_paginated(
             self,
             pagination: PaginationParams
-    ) -> PaginatedResponse[UserRead]:
-        return await self.crud_service.get_paginated(pagination)
+    ) -> dict:
+        """
+        A page of users as plain dicts holding only the UserRead columns.
+        """
+        # The admin listing only needs a ballpark total; use planner statistics where available
+        return await self.crud_service.get_paginated_rows(
+            pagination,
+            columns=[getattr(User, name) for name in UserRead.model_fields],
+            sort_keys=(User.created_at, User.id),
+            default_total=TotalStrategy.ESTIMATE
+        )
+
+
+@job_runner.register("delete_user")
+async def delete_user_job(session: AsyncSession, payload: dict) -> dict:
+    return await UserService(session).purge(UUID(payload["user_id"]))
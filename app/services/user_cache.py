@@ -0,0 +1,132 @@
+from typing import Optional
+from uuid import UUID
+
+from app.core.cache import TTLCache, InvalidationChannel, invalidation_channel
+from app.core.config import get_settings
+from app.core.singleflight import SingleFlight
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.models.user import User
+
+settings = get_settings()
+
+USER_TOPIC = "user"
+AUTH_STATE_TOPIC = "auth_state"
+
+
+class UserCache:
+    """
+    Resolved `User` records keyed by token subject (email).
+    Entries are stored as plain dicts and handed out as fresh, session-less `User` instances.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, channel: InvalidationChannel, enabled: bool = True):
+        self.enabled = enabled
+        self._cache = TTLCache(max_entries=max_entries, ttl=ttl)
+        # user id -> subject, to find an entry on invalidation; bounded and expiring like the entries
+        self._subjects = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.channel = channel
+        self.channel.subscribe(self._on_message)
+
+    def get(self, subject: str) -> Optional[User]:
+        if not self.enabled:
+            return None
+        data = self._cache.get(subject)
+        if data is None:
+            return None
+        return User(**data)
+
+    def set(self, subject: str, user: User):
+        if not self.enabled:
+            return
+        self._subjects.set(user.id, subject)
+        self._cache.set(subject, user.model_dump())
+
+    def invalidate(self, user_id: UUID):
+        """Drop a user locally and tell the other workers to do the same."""
+        self.channel.publish(USER_TOPIC, str(user_id))
+
+    def _on_message(self, topic: str, message: str):
+        if topic != USER_TOPIC:
+            return
+        user_id = UUID(message)
+        subject = self._subjects.get(user_id)
+        if subject is not None:
+            self._subjects.delete(user_id)
+            self._cache.delete(subject)
+
+    def clear(self):
+        self._subjects.clear()
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **self._cache.stats()}
+
+
+class AuthStateCache:
+    """
+    Per-user authorization state (token version, active and admin flags) read from the user table.
+    Token checks use it instead of trusting claims: a miss is answered from the database, never by
+    the token, and an invalidation drops the entry so the next check reloads it. Workers that miss
+    the invalidation pick the change up when their entry expires, after at most `ttl` seconds.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, channel: InvalidationChannel):
+        self._states = TTLCache(max_entries=max_entries, ttl=ttl)
+        self._lookups = SingleFlight()
+        self.channel = channel
+        self.channel.subscribe(self._on_message)
+
+    async def get(self, session: AsyncSession, user_id: UUID) -> Optional[dict]:
+        """The user's current state, or None if there is no such user."""
+        state = self._states.get(user_id)
+        if state is None:
+            state = await self._lookups.do(user_id, lambda: self._load(session, user_id))
+        return state
+
+    async def _load(self, session: AsyncSession, user_id: UUID) -> Optional[dict]:
+        result = await session.execute(
+            select(User.token_version, User.is_active, User.is_superuser).where(User.id == user_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        state = dict(row._mapping)
+        self._states.set(user_id, state)
+        return state
+
+    def observe(self, user: User):
+        """Record the state of a user row just read from the database."""
+        self._states.set(
+            user.id,
+            {"token_version": user.token_version, "is_active": user.is_active, "is_superuser": user.is_superuser},
+        )
+
+    def invalidate(self, user_id: UUID):
+        """Drop a user's state locally and tell the other workers to do the same."""
+        self.channel.publish(AUTH_STATE_TOPIC, str(user_id))
+
+    def _on_message(self, topic: str, message: str):
+        if topic == AUTH_STATE_TOPIC:
+            self._states.delete(UUID(message))
+
+    def clear(self):
+        self._states.clear()
+
+
+user_cache = UserCache(
+    max_entries=settings.user_cache_max_entries,
+    ttl=settings.user_cache_ttl_seconds,
+    channel=invalidation_channel,
+    enabled=settings.user_cache_enabled,
+)
+
+# Coalesces concurrent user-table lookups for the same token subject
+user_lookups = SingleFlight()
+
+auth_states = AuthStateCache(
+    max_entries=settings.user_cache_max_entries,
+    ttl=settings.user_cache_ttl_seconds,
+    channel=invalidation_channel,
+)
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import async_session
+from app.models.user import User
+from app.services.data_version import DataVersionService
+from app.services.user_cache import user_cache
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Columns that may be written behind; everything else goes through UserService
+WRITE_BEHIND_COLUMNS = frozenset({"last_login"})
+
+
+class UserWriteBehind:
+    """
+    Buffers non-critical user bookkeeping (e.g. last_login) in memory, keeping only the latest
+    values per user, and writes them in batched UPDATEs from a background task.
+    Values still buffered when a worker dies are lost, so only use it for data that may be.
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], AsyncSession],
+            interval: float = 5.0,
+            max_pending: int = 1000,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: Dict[UUID, Dict[str, Any]] = {}
+        self._lock = Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+
+    def record(self, user_id: UUID, **values):
+        unknown = set(values) - WRITE_BEHIND_COLUMNS
+        if unknown:
+            raise ValueError(f"Not write-behind columns: {sorted(unknown)}")
+        with self._lock:
+            self._pending.setdefault(user_id, {}).update(values)
+            self.recorded += 1
+            full = len(self._pending) >= self.max_pending
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+    def pending(self, user_id: UUID) -> Dict[str, Any]:
+        """Values buffered for a user and not yet written."""
+        with self._lock:
+            return dict(self._pending.get(user_id, {}))
+
+    async def flush(self) -> int:
+        """Write everything buffered so far in one transaction; returns the number of users written."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        try:
+            async with self.session_factory() as session:
+                # Users deleted since the values were recorded have nothing to update
+                existing = set((await session.execute(select(User.id).where(User.id.in_(batch)))).scalars())
+                by_columns: Dict[frozenset, list] = {}
+                for user_id in existing:
+                    values = batch[user_id]
+                    by_columns.setdefault(frozenset(values), []).append({"user_pk": user_id, **values})
+                for columns, rows in by_columns.items():
+                    statement = (
+                        update(User.__table__)
+                        .where(User.__table__.c.id == bindparam("user_pk"))
+                        .values({column: bindparam(column) for column in columns})
+                    )
+                    await session.execute(statement, rows)
+                versions = DataVersionService(session)
+                for user_id in existing:
+                    await versions.bump(user_id)
+                await session.commit()
+        except Exception:
+            self.failures += 1
+            logger.exception("Write-behind flush of %d users failed; retrying on the next flush", len(batch))
+            self._requeue(batch)
+            return 0
+        except BaseException:
+            # Cancelled mid-write: keep the values for whoever flushes next
+            self._requeue(batch)
+            raise
+
+        for user_id in existing:
+            user_cache.invalidate(user_id)
+        self.batches += 1
+        self.flushed += len(existing)
+        return len(existing)
+
+    def _requeue(self, batch: Dict[UUID, Dict[str, Any]]):
+        with self._lock:
+            for user_id, values in batch.items():
+                # Values recorded while the flush ran are newer
+                self._pending[user_id] = {**values, **self._pending.get(user_id, {})}
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="user-write-behind")
+
+    async def stop(self):
+        """Stop the background task, letting a flush in progress finish, and write whatever is still buffered."""
+        if self._task is not None:
+            # Not cancelled: that would abandon the batch being written
+            self._stopping.set()
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._wakeup = None
+            self._stopping = None
+        await self.flush()
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "pending_users": pending,
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+        }
+
+
+user_writes = UserWriteBehind(
+    session_factory=async_session,
+    interval=settings.write_behind_interval_seconds,
+    max_pending=settings.write_behind_max_pending,
+)
@@ -0,0 +1,91 @@
+"""
+Encode time and allocations of the JSON response paths for two typical payloads:
+a year of intensity counts (365 entries) and a 100-item period page with symptoms.
+
+    python -m benchmarks.response_serialization [--rounds 200]
+
+Paths compared:
+- jsonable_encoder: FastAPI's classic JSONResponse (jsonable_encoder + json.dumps)
+- pydantic dump_json: what FastAPI does for response_model routes with the default class
+- orjson: FastJSONResponse (`fast_json_responses=true`) on the model's python dump
+"""
+import argparse
+import timeit
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, List
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.responses import FastJSONResponse
+from app.schemas.period import DateIntensityCount, PeriodResponse
+from app.services.db_services import PaginatedResponse, page_payload
+
+
+def intensity_payload() -> List[DateIntensityCount]:
+    start = date.today() - timedelta(days=364)
+    return [DateIntensityCount(date=start + timedelta(days=i), count=i % 3) for i in range(365)]
+
+
+def period_page_payload() -> PaginatedResponse[PeriodResponse]:
+    user_id = uuid4()
+    now = datetime.now()
+    items = []
+    for i in range(100):
+        period_id = uuid4()
+        items.append({
+            "id": period_id,
+            "user_id": user_id,
+            "start_date": date(2020, 1, 1) + timedelta(days=28 * i),
+            "end_date": date(2020, 1, 5) + timedelta(days=28 * i),
+            "flow_intensity": "Medium",
+            "notes": "felt fine",
+            "created_at": now,
+            "updated_at": now,
+            "symptoms": [
+                {"id": uuid4(), "period_id": period_id, "name": "cramps", "intensity": "mild", "notes": None},
+                {"id": uuid4(), "period_id": period_id, "name": "fatigue", "intensity": None, "notes": None},
+            ],
+        })
+    adapter = TypeAdapter(PaginatedResponse[PeriodResponse])
+    return adapter.validate_python(page_payload(items, 400, 1, 100))
+
+
+def encoders(payload: Any) -> dict[str, Callable[[], bytes]]:
+    adapter = TypeAdapter(type(payload) if not isinstance(payload, list) else List[type(payload[0])])
+    return {
+        "jsonable_encoder": lambda: JSONResponse(jsonable_encoder(payload)).body,
+        "pydantic dump_json": lambda: adapter.dump_json(payload),
+        "orjson": lambda: FastJSONResponse(adapter.dump_python(payload)).body,
+    }
+
+
+def measure(encode: Callable[[], bytes], rounds: int) -> tuple[float, int, int]:
+    """Mean encode time (ms), peak traced allocation (bytes) and body size for one encode."""
+    seconds = timeit.timeit(encode, number=rounds) / rounds
+    tracemalloc.start()
+    body = encode()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds * 1000, peak, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = {"intensity counts (365)": intensity_payload(), "period page (100)": period_page_payload()}
+    for name, payload in payloads.items():
+        print(f"\n{name}")
+        print(f"  {'path':<20}{'ms/encode':>12}{'peak KiB':>12}{'body KiB':>12}")
+        for path, encode in encoders(payload).items():
+            ms, peak, size = measure(encode, args.rounds)
+            print(f"  {path:<20}{ms:>12.3f}{peak / 1024:>12.1f}{size / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
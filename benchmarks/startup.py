@@ -0,0 +1,78 @@
+"""
+Cold-start latency of an API worker, as paid by every new autoscaled pod.
+Each round runs in a fresh interpreter against an empty SQLite database and reports:
+- import: importing app.main (settings, models, routers)
+- startup: the lifespan startup (engine creation, schema setup)
+- first request: the first request served, including the first pooled connection
+- shutdown: the lifespan shutdown (pool disposal)
+
+    python -m benchmarks.startup [--rounds 10] [--schema create|migrate|check|none]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+ROUND = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app, lifespan
+imported = time.perf_counter()
+
+async def run():
+    from httpx import ASGITransport, AsyncClient
+    timings = {"import": imported - started}
+    start = time.perf_counter()
+    async with lifespan(app):
+        timings["startup"] = time.perf_counter() - start
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            start = time.perf_counter()
+            response = await client.post("/api/v1/auth/login", json={"username": "x@example.com", "password": "x"})
+            timings["first request"] = time.perf_counter() - start
+            assert response.status_code == 401, response.text
+        start = time.perf_counter()
+    timings["shutdown"] = time.perf_counter() - start
+    print(json.dumps(timings))
+
+asyncio.run(run())
+"""
+
+
+def run_round(schema: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        env = {
+            **os.environ,
+            # No env file of its own, so nothing overrides the scratch database URL
+            "APP_ENV": "benchmark",
+            "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark"),
+            "ASYNC_DATABASE_URL": url,
+            "DATABASE_SCHEMA": schema,
+        }
+        process = subprocess.run([sys.executable, "-c", ROUND], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"benchmark round failed:\n{process.stderr}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--schema", default="create", choices=["create", "migrate", "check", "none"])
+    args = parser.parse_args()
+
+    rounds = [run_round(args.schema) for _ in range(args.rounds)]
+    print(f"{'phase':<16}{'median ms':>12}{'max ms':>12}")
+    for phase in rounds[0]:
+        values = [timings[phase] * 1000 for timings in rounds]
+        print(f"{phase:<16}{statistics.median(values):>12.1f}{max(values):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Tables as originally created by `SQLModel.metadata.create_all`. Databases created that way
+can adopt migrations with `alembic stamp 0001` followed by `alembic upgrade head`.
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user",
+        sa.Column("email", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("first_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("last_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("is_superuser", sa.Boolean(), nullable=False),
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("hashed_password", sqlmodel.sql.sqltypes.AutoString(length=1024), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("last_login", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_user_email", "user", ["email"], unique=True)
+    op.create_index("ix_user_id", "user", ["id"], unique=False)
+
+    op.create_table(
+        "period",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=True),
+        sa.Column("flow_intensity", sa.Enum("LIGHT", "MEDIUM", "HEAVY", name="flowintensity"), nullable=True),
+        sa.Column("notes", sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True),
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_period_id", "period", ["id"], unique=False)
+
+    op.create_table(
+        "symptom",
+        sa.Column("period_id", sa.Uuid(), nullable=False),
+        sa.Column("name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("intensity", sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True),
+        sa.Column("notes", sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True),
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["period_id"], ["period.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_symptom_id", "symptom", ["id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_symptom_id", table_name="symptom")
+    op.drop_table("symptom")
+    op.drop_index("ix_period_id", table_name="period")
+    op.drop_table("period")
+    op.drop_index("ix_user_id", table_name="user")
+    op.drop_index("ix_user_email", table_name="user")
+    op.drop_table("user")
+    sa.Enum(name="flowintensity").drop(op.get_bind(), checkfirst=True)
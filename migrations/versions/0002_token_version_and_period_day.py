@@ -0,0 +1,40 @@
+"""token version and period_day calendar
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Adds user.token_version (stateless token revocation) and the derived period_day table.
+Run `python -m app.cli rebuild-calendar` afterwards to backfill period_day.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.add_column(sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"))
+
+    op.create_table(
+        "period_day",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("intensity", sa.Integer(), nullable=False),
+        sa.Column("period_id", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("user_id", "day"),
+    )
+    op.create_index("ix_period_day_period_id", "period_day", ["period_id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_period_day_period_id", table_name="period_day")
+    op.drop_table("period_day")
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("token_version")
@@ -0,0 +1,23 @@
+"""period (user_id, start_date) and symptom (period_id) indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_period_user_id_start_date", "period", ["user_id", "start_date"], unique=False)
+    op.create_index("ix_symptom_period_id", "symptom", ["period_id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_symptom_period_id", table_name="symptom")
+    op.drop_index("ix_period_user_id_start_date", table_name="period")
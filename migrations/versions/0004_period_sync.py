@@ -0,0 +1,35 @@
+"""period tombstones and (user_id, updated_at) index for delta sync
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_period_user_id_updated_at", "period", ["user_id", "updated_at"], unique=False)
+    op.create_table(
+        "period_tombstone",
+        sa.Column("period_id", sa.Uuid(), nullable=False),
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("period_id"),
+    )
+    op.create_index(
+        "ix_period_tombstone_user_id_deleted_at", "period_tombstone", ["user_id", "deleted_at"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_period_tombstone_user_id_deleted_at", table_name="period_tombstone")
+    op.drop_table("period_tombstone")
+    op.drop_index("ix_period_user_id_updated_at", table_name="period")
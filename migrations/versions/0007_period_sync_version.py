@@ -0,0 +1,35 @@
+"""commit-ordered sync_version for delta sync, tombstone pruning watermark
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("period", sa.Column("sync_version", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("period_tombstone", sa.Column("sync_version", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("data_version", sa.Column("pruned_through", sa.Integer(), nullable=False, server_default="0"))
+    op.drop_index("ix_period_user_id_updated_at", table_name="period")
+    op.create_index("ix_period_user_id_sync_version", "period", ["user_id", "sync_version"])
+    op.create_index("ix_period_tombstone_user_id_sync_version", "period_tombstone", ["user_id", "sync_version"])
+
+
+def downgrade():
+    op.drop_index("ix_period_tombstone_user_id_sync_version", table_name="period_tombstone")
+    op.drop_index("ix_period_user_id_sync_version", table_name="period")
+    op.create_index("ix_period_user_id_updated_at", "period", ["user_id", "updated_at"])
+    with op.batch_alter_table("data_version") as batch:
+        batch.drop_column("pruned_through")
+    with op.batch_alter_table("period_tombstone") as batch:
+        batch.drop_column("sync_version")
+    with op.batch_alter_table("period") as batch:
+        batch.drop_column("sync_version")
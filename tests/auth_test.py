@@ -1,5 +1,18 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from uuid import uuid4
+
 from httpx import AsyncClient
 import pytest
+from sqlalchemy import update
+
+from app.core.security import create_access_token
+from app.models.user import User
+from app.services.data_version import DataVersionService
+from app.services.user_cache import auth_states
+from app.services.write_behind import UserWriteBehind, user_writes
+from tests.conftest import async_session_maker
 
 
 @pytest.mark.asyncio
@@ -48,3 +61,138 @@ async def test_refresh_token(client: AsyncClient):
 async def test_logout(client: AsyncClient):
     response = await client.post("api/v1/auth/logout")
     assert response.status_code == 303
+
+
+@pytest.mark.asyncio
+async def test_token_without_version_rejected(client: AsyncClient, normal_user):
+    token = create_access_token(data={"sub": normal_user.email}, expires_delta=timedelta(minutes=5))
+    response = await client.get("api/v1/periods", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+    response = await client.get("api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_revocation_without_cached_state(user_client, admin_client, a_session):
+    """A worker that never saw the invalidation (or restarted) checks the database, not the claims."""
+    user_client, user = user_client
+    admin_client, _ = admin_client
+    assert (await admin_client.get("api/v1/diagnostics")).status_code == 200
+
+    # Changed behind this worker's back: no invalidation reaches it
+    await a_session.execute(update(User).where(User.id == user.id).values(token_version=User.token_version + 1))
+    await a_session.execute(update(User).where(User.is_superuser.is_(True)).values(is_superuser=False))
+    await a_session.commit()
+    auth_states.clear()
+
+    assert (await user_client.get("api/v1/periods")).status_code == 401
+    # A demoted admin keeps a valid token but loses admin rights
+    assert (await admin_client.get("api/v1/diagnostics")).status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_stale_token_rejected_after_password_change(user_client: AsyncClient, faker):
+    user_client, _ = user_client
+    response = await user_client.get("api/v1/periods/recent")
+    assert response.status_code == 200
+
+    password_data = {"current_password": "password", "new_password": faker.password(length=10)}
+    response = await user_client.post("api/v1/users/me/change-password", json=password_data)
+    assert response.status_code == 200
+
+    response = await user_client.get("api/v1/periods/recent")
+    assert response.status_code == 401
+    response = await user_client.get("api/v1/users/me")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_login_writes_last_login_behind(client: AsyncClient, normal_user):
+    async with async_session_maker() as session:
+        version_before, _ = await DataVersionService(session).get(normal_user.id)
+
+    response = await client.post("api/v1/auth/login", json={"username": normal_user.email, "password": "password"})
+    assert response.status_code == 200
+    assert "last_login" in user_writes.pending(normal_user.id)
+    # Login itself changed nothing in the database
+    async with async_session_maker() as session:
+        assert (await DataVersionService(session).get(normal_user.id))[0] == version_before
+        assert (await session.get(User, normal_user.id)).last_login is None
+
+    buffer = UserWriteBehind(session_factory=async_session_maker)
+    first, latest = datetime(2026, 1, 1, 8, 0), datetime(2026, 1, 1, 9, 0)
+    buffer.record(normal_user.id, last_login=first)
+    buffer.record(normal_user.id, last_login=latest)
+    buffer.record(uuid4(), last_login=latest)  # deleted user: skipped
+    with pytest.raises(ValueError):
+        buffer.record(normal_user.id, is_superuser=True)
+
+    assert await buffer.flush() == 1
+    assert buffer.pending(normal_user.id) == {}
+
+    async with async_session_maker() as session:
+        assert (await session.get(User, normal_user.id)).last_login == latest
+        assert (await DataVersionService(session).get(normal_user.id))[0] == version_before + 1
+    assert buffer.stats()["batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_write_behind_drains_on_stop(normal_user, setup_db):
+    buffer = UserWriteBehind(session_factory=async_session_maker, interval=3600)
+    await buffer.start()
+    buffer.record(normal_user.id, last_login=datetime(2026, 2, 1, 7, 30))
+    await buffer.stop()
+
+    assert buffer.stats()["pending_users"] == 0
+    async with async_session_maker() as session:
+        assert (await session.get(User, normal_user.id)).last_login == datetime(2026, 2, 1, 7, 30)
+
+
+def slow_sessions(entered: asyncio.Event, delay: float):
+    """Session factory whose sessions stall on every statement."""
+
+    @asynccontextmanager
+    async def factory():
+        async with async_session_maker() as session:
+            execute = session.execute
+
+            async def slow_execute(*args, **kwargs):
+                entered.set()
+                await asyncio.sleep(delay)
+                return await execute(*args, **kwargs)
+
+            session.execute = slow_execute
+            yield session
+
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_write_behind_keeps_batch_when_flush_cancelled(normal_user, setup_db):
+    entered = asyncio.Event()
+    buffer = UserWriteBehind(session_factory=slow_sessions(entered, 3600))
+    buffer.record(normal_user.id, last_login=datetime(2026, 3, 1, 6, 0))
+
+    flush = asyncio.create_task(buffer.flush())
+    await entered.wait()
+    assert buffer.pending(normal_user.id) == {}
+    flush.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flush
+    assert buffer.pending(normal_user.id) == {"last_login": datetime(2026, 3, 1, 6, 0)}
+
+
+@pytest.mark.asyncio
+async def test_write_behind_stop_waits_for_flush_in_progress(normal_user, setup_db):
+    entered = asyncio.Event()
+    buffer = UserWriteBehind(session_factory=slow_sessions(entered, 0.05), interval=3600, max_pending=1)
+    await buffer.start()
+    buffer.record(normal_user.id, last_login=datetime(2026, 3, 2, 6, 0))
+    await entered.wait()
+    await buffer.stop()
+
+    # The loop's own flush completed instead of being abandoned
+    stats = buffer.stats()
+    assert (stats["running"], stats["batches"], stats["pending_users"]) == (False, 1, 0)
+    async with async_session_maker() as session:
+        assert (await session.get(User, normal_user.id)).last_login == datetime(2026, 3, 2, 6, 0)
@@ -0,0 +1,209 @@
+import time
+from typing import Optional
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from pydantic import TypeAdapter
+
+from app.core.cache import TTLCache, InvalidationChannel, PostgresInvalidationChannel, build_invalidation_channel
+from app.models.user import User
+from app.services.response_cache import (
+    MISSING, MemoryBackend, ResponseCache, ResponseCacheBackend, build_backend, response_cache
+)
+from app.services.user_cache import UserCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_entries=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_user_cache_invalidation_reaches_other_subscribers(faker):
+    channel = InvalidationChannel()
+    worker_a = UserCache(max_entries=10, ttl=60, channel=channel)
+    worker_b = UserCache(max_entries=10, ttl=60, channel=channel)
+    user = User(email=faker.email(), first_name="a", last_name="b", hashed_password="x")
+    worker_a.set(user.email, user)
+    worker_b.set(user.email, user)
+
+    worker_a.invalidate(user.id)
+
+    assert worker_a.get(user.email) is None
+    assert worker_b.get(user.email) is None
+
+
+def test_user_cache_reverse_map_is_bounded(faker):
+    cache = UserCache(max_entries=2, ttl=60, channel=InvalidationChannel())
+    for _ in range(5):
+        user = User(email=faker.unique.email(), first_name="a", last_name="b", hashed_password="x")
+        cache.set(user.email, user)
+
+    assert len(cache._subjects) == 2
+    cache.invalidate(user.id)
+    assert cache.get(user.email) is None
+
+
+def test_postgres_channel_relays_between_workers(faker):
+    # Two workers' channels; the NOTIFY round trip is played by hand
+    worker_a = PostgresInvalidationChannel("postgresql://app@db/app")
+    worker_b = PostgresInvalidationChannel("postgresql://app@db/app")
+    cache_a = UserCache(max_entries=10, ttl=60, channel=worker_a)
+    cache_b = UserCache(max_entries=10, ttl=60, channel=worker_b)
+    user = User(email=faker.email(), first_name="a", last_name="b", hashed_password="x")
+    cache_a.set(user.email, user)
+    cache_b.set(user.email, user)
+
+    cache_a.invalidate(user.id)
+    assert cache_a.get(user.email) is None
+    assert cache_b.get(user.email) is not None
+
+    payload = worker_a._outbox.get_nowait()
+    for worker in (worker_a, worker_b):
+        worker._on_notify(None, 0, worker.name, payload)
+    assert cache_b.get(user.email) is None
+    # A worker ignores its own notifications and anything malformed
+    worker_b._on_notify(None, 0, worker_b.name, "not json")
+    assert (worker_a.stats()["received"], worker_b.stats()["received"]) == (0, 1)
+
+
+def test_build_invalidation_channel():
+    assert type(build_invalidation_channel("local", "sqlite:///./app.db")) is InvalidationChannel
+    channel = build_invalidation_channel("postgres", "postgresql+asyncpg://app:secret@db/app")
+    assert channel.cross_worker and channel.dsn == "postgresql://app:secret@db/app"
+    with pytest.raises(ValueError, match="requires a Postgres"):
+        build_invalidation_channel("postgres", "sqlite:///./app.db")
+    with pytest.raises(ValueError, match="Unknown"):
+        build_invalidation_channel("carrier-pigeon", "sqlite:///./app.db")
+
+
+@pytest.mark.asyncio
+async def test_response_cache_keys_on_user_and_version():
+    cache = ResponseCache(MemoryBackend(max_entries=2, ttl=60))
+    adapter = TypeAdapter(Optional[int])
+    user_a, user_b = uuid4(), uuid4()
+    loads = []
+
+    async def load(value):
+        loads.append(value)
+        return value
+
+    assert await cache.get_or_load(user_a, 1, "recent", adapter, lambda: load(None)) is None
+    assert await cache.get_or_load(user_a, 1, "recent", adapter, lambda: load(1)) is None
+    assert await cache.get_or_load(user_a, 2, "recent", adapter, lambda: load(2)) == 2
+    assert loads == [None, 2]
+
+    await cache.get_or_load(user_b, 1, "recent", adapter, lambda: load(3))
+    await cache.invalidate(user_a)
+    assert await cache.get_or_load(user_a, 2, "recent", adapter, lambda: load(4)) == 4
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 4, 1)
+
+
+class DictBackend(ResponseCacheBackend):
+    """A shared backend as a plugged-in one would be: it only ever sees JSON bytes."""
+    shared = True
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key: tuple):
+        return self.values.get(key, MISSING)
+
+    async def set(self, key: tuple, value: bytes):
+        assert isinstance(value, bytes)
+        self.values[key] = value
+
+    async def invalidate(self, user_id):
+        self.values = {key: value for key, value in self.values.items() if key[0] != user_id}
+
+    def clear(self):
+        self.values.clear()
+
+
+def dict_backend(settings) -> DictBackend:
+    return DictBackend()
+
+
+def test_response_cache_backend_from_settings():
+    assert isinstance(build_backend("memory"), MemoryBackend)
+    assert build_backend("none") is None
+    # Imported afresh by its dotted path, so compared by name
+    assert type(build_backend("tests.cache_test:dict_backend")).__name__ == "DictBackend"
+    with pytest.raises(TypeError):
+        build_backend("tests.cache_test:DictBackend")
+    with pytest.raises(ValueError):
+        build_backend("redis")
+
+
+@pytest.mark.asyncio
+async def test_response_cache_shared_backend_round_trips_json():
+    backend = DictBackend()
+    cache = ResponseCache(backend)
+    adapter = TypeAdapter(Optional[int])
+    user_id = uuid4()
+
+    async def load():
+        return 7
+
+    assert await cache.get_or_load(user_id, 1, "recent", adapter, load) == 7
+    assert backend.values == {(user_id, 1, "recent"): b"7"}
+    assert await cache.get_or_load(user_id, 1, "recent", adapter, lambda: pytest.fail("loaded again")) == 7
+    await cache.invalidate(user_id)
+    assert backend.values == {}
+
+
+def test_response_cache_backend_must_implement_storage():
+    class Incomplete(ResponseCacheBackend):
+        async def get(self, key: tuple):
+            return MISSING
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.asyncio
+async def test_dashboard_reads_are_cached_until_a_write(user_client: AsyncClient):
+    user_client, _ = user_client
+    await user_client.post("api/v1/periods", json={"start_date": "2024-01-01"})
+    for _ in range(2):
+        await user_client.get("api/v1/periods/recent")
+        await user_client.get("api/v1/periods/intensity-counts")
+        await user_client.get("api/v1/periods")
+    assert (response_cache.hits, response_cache.misses) == (3, 3)
+
+    await user_client.post("api/v1/periods", json={"start_date": "2024-02-01"})
+    response = await user_client.get("api/v1/periods/recent")
+    assert response.json()["start_date"] == "2024-02-01"
+    assert len((await user_client.get("api/v1/periods")).json()["items"]) == 2
+    assert response_cache.stats()["entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_response_cache_freed_after_update_and_delete(user_client: AsyncClient):
+    user_client, _ = user_client
+    period = (await user_client.post("api/v1/periods", json={"start_date": "2024-01-01"})).json()
+    await user_client.get("api/v1/periods/recent")
+    assert response_cache.stats()["entries"] == 1
+
+    await user_client.patch(f"api/v1/periods/{period['id']}", json={"notes": "edited"})
+    assert response_cache.stats()["entries"] == 0
+    assert (await user_client.get("api/v1/periods/recent")).json()["notes"] == "edited"
+
+    await user_client.delete(f"api/v1/periods/{period['id']}")
+    assert response_cache.stats()["entries"] == 0
@@ -0,0 +1,95 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, update
+
+from app.models.user import User
+from app.services.data_version import DataVersionService
+from tests.conftest import async_session_maker
+
+
+@pytest.fixture
+def statements(a_session):
+    """SQL the app sends while the test runs"""
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    engine = a_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", _capture)
+    yield captured
+    event.remove(engine, "before_cursor_execute", _capture)
+
+
+@pytest.mark.asyncio
+async def test_periods_conditional_get(user_client: AsyncClient, statements):
+    user_client, _ = user_client
+    await user_client.post("api/v1/periods", json={"start_date": "2024-01-01"})
+
+    response = await user_client.get("api/v1/periods/recent")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert "last-modified" in response.headers
+
+    statements.clear()
+    response = await user_client.get("api/v1/periods/recent", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    # Only the data version was read
+    assert not any("FROM period" in statement for statement in statements)
+
+    response = await user_client.get("api/v1/periods/recent", headers={
+        "If-Modified-Since": response.headers["last-modified"]
+    })
+    assert response.status_code == 304
+
+    # Each representation has its own tag
+    page = await user_client.get("api/v1/periods", params={"limit": 5})
+    assert page.headers["etag"] != etag
+    assert (await user_client.get(
+        "api/v1/periods", params={"limit": 5}, headers={"If-None-Match": page.headers["etag"]}
+    )).status_code == 304
+    counts = await user_client.get("api/v1/periods/intensity-counts")
+    assert "last-modified" not in counts.headers
+
+    # Writes bump the version, so the old tags no longer match
+    await user_client.post("api/v1/periods", json={"start_date": "2024-02-01"})
+    response = await user_client.get("api/v1/periods/recent", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["start_date"] == "2024-02-01"
+    response = await user_client.get(
+        "api/v1/periods", params={"limit": 5}, headers={"If-None-Match": page.headers["etag"]}
+    )
+    assert len(response.json()["items"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_users_me_conditional_get(user_client: AsyncClient, faker):
+    user_client, _ = user_client
+    response = await user_client.get("api/v1/users/me")
+    etag = response.headers["etag"]
+    assert (await user_client.get("api/v1/users/me", headers={"If-None-Match": etag})).status_code == 304
+
+    await user_client.patch("api/v1/users/me", json={"first_name": faker.first_name()})
+    response = await user_client.get("api/v1/users/me", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_users_me_body_matches_etag(user_client: AsyncClient):
+    user_client, user = user_client
+    response = await user_client.get("api/v1/users/me")
+    etag = response.headers["etag"]
+
+    # Another worker's write: this process's user cache never hears about it
+    async with async_session_maker() as session:
+        await session.execute(update(User).where(User.id == user.id).values(first_name="Elsewhere"))
+        await DataVersionService(session).bump(user.id)
+        await session.commit()
+
+    response = await user_client.get("api/v1/users/me", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["first_name"] == "Elsewhere"
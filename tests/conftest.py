@@ -9,12 +9,16 @@ from sqlalchemy.orm import sessionmaker
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from app.core.config import get_settings, Settings
-from app.core.database import get_async_session
-from app.core.security import create_access_token
+from app.api.deps import get_read_session
+from app.core.database import get_async_session, read_router
+from app.core.security import create_access_token, user_token_claims
 from app.main import app
 from app.models.period import Period, FlowIntensity
 from app.models.user import User, UserCreate
 from app.services.user import UserService
+from app.services.response_cache import response_cache
+from app.services.user_cache import user_cache, auth_states
+from app.services.write_behind import user_writes
 
 get_settings.cache_clear()
 
@@ -44,8 +48,14 @@ async def a_session(setup_db):
 def test_app(override_get_session):
     """App fixture for standard overwrites"""
     app.dependency_overrides[get_async_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
     yield app
     app.dependency_overrides.clear()
+    user_cache.clear()
+    auth_states.clear()
+    response_cache.clear()
+    read_router.clear()
+    user_writes.clear()
 
 
 @pytest.fixture
@@ -110,7 +120,7 @@ async def superuser(override_get_session, faker):
 @pytest.fixture
 async def user_client(normal_user, test_app):
     """Fixture to create a TestClient with a bearer token for the authenticated user"""
-    access_token = create_access_token(data={"sub": normal_user.email}, expires_delta=timedelta(minutes=15))
+    access_token = create_access_token(data=user_token_claims(normal_user), expires_delta=timedelta(minutes=15))
 
     # Create the TestClient with the Bearer token in the headers
     headers = {
@@ -129,7 +139,7 @@ async def user_client(normal_user, test_app):
 @pytest.fixture
 async def admin_client(superuser: User, test_app):
     """Fixture to create a TestClient with a bearer token for the authenticated user"""
-    access_token = create_access_token(data={"sub": superuser.email}, expires_delta=timedelta(minutes=15))
+    access_token = create_access_token(data=user_token_claims(superuser), expires_delta=timedelta(minutes=15))
 
     # Create the TestClient with the Bearer token in the headers
     headers = {
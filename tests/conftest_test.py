@@ -1,7 +1,13 @@
+import os
+
+
 def test_settings_override():
     print("Starting test")  # Debug print
     from app.core.config import get_settings
     settings = get_settings()
     print(f"Got settings: database_url={settings.database_url}, secret_key={settings.secret_key}")  # Debug print
     assert settings.secret_key == "test_secret_key"
-    assert settings.database_url == "sqlite:///:memory:"
+    if os.getenv("APP_ENV") == "testing-postgres":
+        assert settings.async_database_url.startswith("postgresql+asyncpg://")
+    else:
+        assert settings.database_url == "sqlite:///:memory:"
@@ -0,0 +1,176 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import inspect
+
+from app.core import database as database_module
+from app.core.config import DATABASE_PROFILES, get_settings, to_async_url
+from app.core.cache import InvalidationChannel
+from app.core.database import READ_MARKER_COOKIE, Database, ReadRouter, init_db, read_router, record_write
+
+
+@pytest.fixture
+def scratch_database(tmp_path, monkeypatch):
+    """Point the app's Database at an empty SQLite file"""
+    scratch = Database(f"sqlite+aiosqlite:///{tmp_path}/scratch.db")
+    monkeypatch.setattr(database_module, "database", scratch)
+    yield scratch
+
+
+async def table_names(db: Database) -> set:
+    async with db.engine.connect() as conn:
+        return set(await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names()))
+
+
+@pytest.mark.asyncio
+async def test_engine_is_created_lazily_and_disposed(scratch_database):
+    assert scratch_database._engine is None
+    async with scratch_database.session_factory() as session:
+        await session.connection()
+    assert scratch_database._engine is not None
+
+    await scratch_database.dispose()
+    assert scratch_database._engine is None
+
+
+@pytest.mark.asyncio
+async def test_init_db_schema_modes(scratch_database):
+    with pytest.raises(RuntimeError, match="alembic upgrade head"):
+        await init_db("check")
+
+    await init_db("migrate")
+    await init_db("check")
+    assert {"user", "period", "period_day", "data_version", "alembic_version"} <= await table_names(scratch_database)
+    await scratch_database.dispose()
+
+
+@pytest.mark.asyncio
+async def test_init_db_create(scratch_database):
+    await init_db("create")
+    assert "period" in await table_names(scratch_database)
+    with pytest.raises(ValueError):
+        await init_db("sometimes")
+    await scratch_database.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_profile_is_applied_on_connect(tmp_path):
+    db = Database(
+        f"sqlite+aiosqlite:///{tmp_path}/tuned.db",
+        profile=DATABASE_PROFILES["sqlite-concurrent"],
+        profile_name="sqlite-concurrent",
+    )
+    await db.validate()
+    described = await db.describe()
+    await db.dispose()
+
+    assert described["profile"] == "sqlite-concurrent"
+    assert described["effective"] == {
+        "journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000, "cache_size": -65536, "mmap_size": 268435456
+    }
+
+
+@pytest.mark.asyncio
+async def test_profiles_are_validated():
+    db = Database("postgresql+asyncpg://app@db/app", profile=DATABASE_PROFILES["sqlite-concurrent"])
+    with pytest.raises(ValueError, match="SQLite pragmas"):
+        await db.validate()
+    assert db._engine is None
+
+    settings = get_settings().model_copy(update={"database_profile": "postgres-web"})
+    settings.database_profile_overrides = {"pool_size": 3}
+    tuning = settings.database_tuning()
+    assert (tuning.pool_size, tuning.max_overflow) == (3, 20)
+
+    settings.database_profile = "turbo"
+    with pytest.raises(ValueError, match="Unknown database_profile"):
+        settings.database_tuning()
+    settings.database_profile, settings.database_profile_overrides = "default", {"pool_size": 0}
+    with pytest.raises(ValueError):
+        settings.database_tuning()
+
+
+def test_async_url_derivation():
+    assert to_async_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert to_async_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert to_async_url("postgres://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert to_async_url("postgresql+psycopg2://u@db/app?sslmode=require") == "postgresql+asyncpg://u@db/app?sslmode=require"
+    with pytest.raises(ValueError, match="Unsupported database backend"):
+        to_async_url("mysql://u@db/app")
+
+    # Passed explicitly: test.env sets ASYNC_DATABASE_URL in the environment
+    settings = type(get_settings())(database_url="postgresql://u@db/app", async_database_url=None)
+    assert settings.async_database_url == "postgresql+asyncpg://u@db/app"
+
+
+@pytest.mark.asyncio
+async def test_postgres_connect_args():
+    options = DATABASE_PROFILES["postgres-web"].engine_options("postgresql")
+    assert options["connect_args"] == {
+        "prepared_statement_cache_size": 500,
+        "server_settings": {"statement_timeout": "30000"},
+    }
+    assert "connect_args" not in DATABASE_PROFILES["default"].engine_options("postgresql")
+
+    db = Database("postgresql+asyncpg://app@db/app", profile=DATABASE_PROFILES["postgres-web"])
+    assert db.engine.dialect.driver == "asyncpg"
+    await db.dispose()
+    with pytest.raises(ValueError, match="Postgres options"):
+        DATABASE_PROFILES["postgres-web"].validate_for("sqlite")
+
+
+def test_read_router_routing(tmp_path):
+    primary = Database(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+    replicas = [Database(f"sqlite+aiosqlite:///{tmp_path}/replica{i}.db") for i in range(2)]
+    router = ReadRouter(primary, replicas, sticky_seconds=60, channel=InvalidationChannel(), secret="s")
+    writer, reader = uuid4(), uuid4()
+
+    assert [router.database_for(reader) for _ in range(3)] == [replicas[0], replicas[1], replicas[0]]
+    router.mark_written(writer)
+    assert router.database_for(writer) is primary
+    assert router.database_for(reader) is replicas[1]
+    assert router.stats()["routed"] == {"primary": 0, "replica": 4, "sticky": 1}
+
+    assert ReadRouter(primary, [], sticky_seconds=60, channel=InvalidationChannel(), secret="s").database_for(reader) is primary
+
+
+def test_read_router_follows_write_marker(tmp_path):
+    primary = Database(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+    replica = Database(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    # The marker was issued by another worker sharing the secret; this one never saw the write
+    issuer = ReadRouter(primary, [replica], sticky_seconds=60, channel=InvalidationChannel(), secret="s")
+    router = ReadRouter(primary, [replica], sticky_seconds=60, channel=InvalidationChannel(), secret="s")
+    user = uuid4()
+    marker = issuer.issue_marker()
+
+    assert router.database_for(user, marker) is primary
+    expires, _, signature = marker.partition(".")
+    forged = f"{int(expires) + 3600}.{signature}"
+    expired = f"{int(expires) - 120}.{router._sign(int(expires) - 120)}"
+    for other in (None, "", "garbage", forged, expired):
+        assert router.database_for(user, other) is replica
+
+
+@pytest.mark.asyncio
+async def test_writes_set_read_marker(user_client, monkeypatch):
+    user_client, _ = user_client
+    monkeypatch.setattr(read_router, "replicas", [read_router.primary])
+
+    response = await user_client.post("api/v1/periods", json={"start_date": "2024-01-01"})
+    assert read_router.marker_pins(response.cookies[READ_MARKER_COOKIE])
+    response = await user_client.get("api/v1/periods/recent")
+    assert READ_MARKER_COOKIE not in response.cookies
+
+
+@pytest.mark.asyncio
+async def test_commits_mark_writers(scratch_database):
+    committed, rolled_back = uuid4(), uuid4()
+    async with scratch_database.session_factory() as session:
+        record_write(session, committed)
+        await session.commit()
+        record_write(session, rolled_back)
+        await session.rollback()
+    await scratch_database.dispose()
+
+    assert read_router._recent_writers.get(committed) is True
+    assert read_router._recent_writers.get(rolled_back) is None
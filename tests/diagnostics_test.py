@@ -0,0 +1,19 @@
+from httpx import AsyncClient
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_read_diagnostics(user_client: AsyncClient, admin_client: AsyncClient):
+    user_client, _ = user_client
+    admin_client, _ = admin_client
+    response = await user_client.get("api/v1/diagnostics")
+    assert response.status_code == 403
+
+    response = await admin_client.get("api/v1/diagnostics")
+    assert response.status_code == 200
+    assert "pending" in response.json()["password_pool"]
+
+    response = await admin_client.get("api/v1/diagnostics/database")
+    assert response.status_code == 200
+    assert response.json()["profile"] == "default"
+    assert response.json()["dialect"] == "sqlite"
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+
+from app.models.job import Job, JobStatus
+from app.services.jobs import JobRunner, job_runner
+from tests.conftest import async_session_maker
+
+
+def scratch_runner(**kwargs) -> JobRunner:
+    runner = JobRunner(session_factory=async_session_maker, retry_backoff=0, **kwargs)
+    runner.flaky_calls = 0
+
+    @runner.register("echo")
+    async def echo(session, payload):
+        return {"echo": payload["value"]}
+
+    @runner.register("flaky")
+    async def flaky(session, payload):
+        runner.flaky_calls += 1
+        if runner.flaky_calls <= payload["fail_times"]:
+            raise RuntimeError("boom")
+        return None
+
+    return runner
+
+
+async def load_job(job_id) -> Job:
+    async with async_session_maker() as session:
+        return await session.get(Job, job_id)
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_and_retry(setup_db):
+    runner = scratch_runner()
+    async with async_session_maker() as session:
+        echo = await runner.enqueue(session, "echo", {"value": 1})
+        recovered = await runner.enqueue(session, "flaky", {"fail_times": 1}, max_attempts=2)
+        await session.commit()
+    with pytest.raises(ValueError):
+        await runner.enqueue(None, "missing")
+
+    assert await runner.run_pending() == 3
+    echo, recovered = await load_job(echo.id), await load_job(recovered.id)
+    assert (echo.status, echo.result, echo.attempts) == (JobStatus.SUCCEEDED, {"echo": 1}, 1)
+    assert (recovered.status, recovered.attempts, recovered.error) == (JobStatus.SUCCEEDED, 2, None)
+
+    async with async_session_maker() as session:
+        failing = await runner.enqueue(session, "flaky", {"fail_times": 5}, max_attempts=2)
+        await session.commit()
+    runner.flaky_calls = 0
+    assert await runner.run_pending() == 2
+    failing = await load_job(failing.id)
+    assert (failing.status, failing.attempts, failing.error) == (JobStatus.FAILED, 2, "RuntimeError: boom")
+    assert runner.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_job_runner_background(setup_db):
+    runner = scratch_runner(concurrency=2, poll_interval=0.05)
+    await runner.start()
+    async with async_session_maker() as session:
+        jobs = [await runner.enqueue(session, "echo", {"value": i}) for i in range(4)]
+        await session.commit()
+    for _ in range(100):
+        if runner.stats()["succeeded"] == 4:
+            break
+        await asyncio.sleep(0.05)
+    await runner.stop()
+
+    assert {(await load_job(job.id)).status for job in jobs} == {JobStatus.SUCCEEDED}
+    assert not runner.stats()["running"]
+
+
+@pytest.mark.asyncio
+async def test_job_runner_recovers_stale_jobs_while_running(setup_db):
+    runner = scratch_runner(poll_interval=0.02, stale_after=0.1)
+    await runner.start()
+    # A job claimed by a worker that died after the runner started
+    async with async_session_maker() as session:
+        job = await runner.enqueue(session, "echo", {"value": 1})
+        job.status, job.attempts, job.started_at = JobStatus.RUNNING, 1, datetime.now()
+        await session.commit()
+    for _ in range(100):
+        if runner.stats()["succeeded"] == 1:
+            break
+        await asyncio.sleep(0.02)
+    await runner.stop()
+
+    job = await load_job(job.id)
+    assert (job.status, job.result) == (JobStatus.SUCCEEDED, {"echo": 1})
+
+
+@pytest.mark.asyncio
+async def test_job_status_endpoint(user_client, admin_client, monkeypatch):
+    user_client, _ = user_client
+    admin_client, _ = admin_client
+    monkeypatch.setattr(job_runner, "session_factory", async_session_maker)
+
+    response = await user_client.post("api/v1/jobs/rebuild-calendar")
+    assert response.status_code == 403
+    response = await admin_client.post("api/v1/jobs/rebuild-calendar")
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.json()["status"] == "pending"
+
+    await job_runner.run_pending()
+    response = await admin_client.get(f"api/v1/jobs/{job_id}")
+    assert response.json()["status"] == "succeeded"
+    assert response.json()["result"] == {"rows": 0}
+    # Other users can't see it
+    response = await user_client.get(f"api/v1/jobs/{job_id}")
+    assert response.status_code == 404
@@ -1,5 +1,21 @@
+import base64
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from uuid import UUID
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import inspect, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from app.models.calendar import PeriodDay
+from app.models.period import Period, PeriodTombstone
+from app.services.calendar import PeriodCalendar
+from app.services.data_version import DataVersionService
+from app.services.period import LoadProfile, PeriodService
 
 
 @pytest.mark.asyncio
@@ -77,3 +93,357 @@ async def test_delete_period(user_client: AsyncClient, a_period):
     period = await a_period(user)
     response = await user_client.delete(f"api/v1/periods/{period.id}")
     assert response.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_get_period_intensity_counts_expands_days(user_client: AsyncClient):
+    user_client, user = user_client
+    today = date.today()
+    periods = [
+        # Started before the one-year window but overlaps it
+        {"start_date": today - timedelta(days=368), "end_date": today - timedelta(days=363), "flow_intensity": "Heavy"},
+        {"start_date": today - timedelta(days=30), "end_date": today - timedelta(days=26), "flow_intensity": "Light"},
+        # Overlaps the previous one; the later start wins
+        {"start_date": today - timedelta(days=27), "end_date": today - timedelta(days=25), "flow_intensity": "Medium"},
+        # Open-ended period only covers its start day
+        {"start_date": today - timedelta(days=2), "flow_intensity": "Heavy"},
+    ]
+    for period in periods:
+        payload = {key: str(value) for key, value in period.items()}
+        response = await user_client.post("api/v1/periods", json=payload)
+        assert response.status_code == 201
+
+    response = await user_client.get("api/v1/periods/intensity-counts")
+    assert response.status_code == 200
+    counts = {item["date"]: item["count"] for item in response.json()}
+
+    expected = {}
+    for offset in range(365, 362, -1):
+        expected[str(today - timedelta(days=offset))] = 2
+    for offset in (30, 29, 28):
+        expected[str(today - timedelta(days=offset))] = 0
+    for offset in (27, 26, 25):
+        expected[str(today - timedelta(days=offset))] = 1
+    expected[str(today - timedelta(days=2))] = 2
+    assert counts == expected
+    assert list(counts) == sorted(counts)
+
+
+@pytest.mark.asyncio
+async def test_period_calendar_follows_updates_and_deletes(user_client: AsyncClient):
+    user_client, user = user_client
+    today = date.today()
+    response = await user_client.post("api/v1/periods", json={
+        "start_date": str(today - timedelta(days=10)),
+        "end_date": str(today - timedelta(days=6)),
+        "flow_intensity": "Heavy",
+    })
+    period_id = response.json()["id"]
+
+    response = await user_client.patch(f"api/v1/periods/{period_id}", json={
+        "end_date": str(today - timedelta(days=8)),
+        "flow_intensity": "Medium",
+    })
+    assert response.status_code == 200
+    response = await user_client.get("api/v1/periods/intensity-counts")
+    assert response.json() == [
+        {"date": str(today - timedelta(days=offset)), "count": 1} for offset in (10, 9, 8)
+    ]
+
+    response = await user_client.delete(f"api/v1/periods/{period_id}")
+    assert response.status_code == 204
+    response = await user_client.get("api/v1/periods/intensity-counts")
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_period_writes_lock_before_calendar(user_client: AsyncClient, monkeypatch):
+    user_client, _ = user_client
+    calls = []
+    bump, sync_period = DataVersionService.bump, PeriodCalendar.sync_period
+
+    async def recording_bump(self, *args, **kwargs):
+        calls.append("bump")
+        return await bump(self, *args, **kwargs)
+
+    async def recording_sync(self, *args, **kwargs):
+        calls.append("calendar")
+        return await sync_period(self, *args, **kwargs)
+
+    monkeypatch.setattr(DataVersionService, "bump", recording_bump)
+    monkeypatch.setattr(PeriodCalendar, "sync_period", recording_sync)
+
+    # The data version row lock serializes a user's calendar rewrites, so it comes first
+    period_id = (await user_client.post("api/v1/periods", json={"start_date": "2024-01-01"})).json()["id"]
+    await user_client.patch(f"api/v1/periods/{period_id}", json={"end_date": "2024-01-03"})
+    await user_client.delete(f"api/v1/periods/{period_id}")
+    assert calls == ["bump", "calendar"] * 3
+
+
+@pytest.mark.asyncio
+async def test_period_calendar_rebuild(a_session, user_client: AsyncClient, a_period):
+    user_client, user = user_client
+    periods = [await a_period(user) for _ in range(3)]
+
+    await PeriodCalendar(a_session).rebuild(user.id)
+    await a_session.commit()
+
+    result = await a_session.execute(select(PeriodDay.day).where(PeriodDay.user_id == user.id))
+    days = set(result.scalars().all())
+    expected = set()
+    for period in periods:
+        day = period.start_date
+        while day <= period.end_date:
+            expected.add(day)
+            day += timedelta(days=1)
+    assert days == expected
+
+
+@pytest.mark.asyncio
+async def test_list_periods_cursor_mode(user_client: AsyncClient, a_period):
+    user_client, user = user_client
+    periods = [await a_period(user) for _ in range(5)]
+
+    seen = []
+    response = await user_client.get("api/v1/periods", params={"mode": "cursor", "limit": 2})
+    while True:
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total"] is None
+        seen.extend(item["id"] for item in body["items"])
+        if body["next_cursor"] is None:
+            break
+        response = await user_client.get("api/v1/periods", params={"after": body["next_cursor"], "limit": 2})
+
+    expected = sorted(periods, key=lambda period: (period.start_date, str(period.id)))
+    assert seen == [str(period.id) for period in expected]
+
+    response = await user_client.get("api/v1/periods", params={"after": "not-a-cursor"})
+    assert response.status_code == 400
+    # Well-formed JSON of the wrong shape or types
+    for payload in ([1, 2], {"a": 1}, ["2026-01-01", None], ["not-a-date", "not-a-uuid"]):
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        response = await user_client.get("api/v1/periods", params={"after": cursor})
+        assert response.status_code == 400
+        response = await user_client.get("api/v1/periods/changes", params={"since": cursor})
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_periods_total_strategies(user_client: AsyncClient, a_period):
+    user_client, user = user_client
+    [await a_period(user) for _ in range(3)]
+
+    response = await user_client.get("api/v1/periods", params={"limit": 2, "total": "none"})
+    assert response.json()["total"] is None
+    assert len(response.json()["items"]) == 2
+
+    response = await user_client.get("api/v1/periods", params={"limit": 2, "page": 5})
+    assert response.json()["items"] == []
+    assert response.json()["total"] == 3
+
+    response = await user_client.get("api/v1/periods", params={"mode": "cursor", "limit": 2, "total": "exact"})
+    assert response.json()["total"] == 3
+    assert response.json()["total_pages"] == 2
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_period_with_symptoms(user_client: AsyncClient):
+    user_client, _ = user_client
+    response = await user_client.post("api/v1/periods", json={
+        "start_date": "2024-03-01",
+        "symptoms": [{"name": "cramps"}, {"name": "fatigue"}],
+    })
+    period_id = response.json()["id"]
+
+    response = await user_client.patch(f"api/v1/periods/{period_id}", json={"end_date": "2024-03-04"})
+    assert response.status_code == 200
+    assert response.json()["end_date"] == "2024-03-04"
+    assert {symptom["name"] for symptom in response.json()["symptoms"]} == {"cramps", "fatigue"}
+
+    response = await user_client.delete(f"api/v1/periods/{period_id}")
+    assert response.status_code == 204
+    response = await user_client.get(f"api/v1/periods/{period_id}")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_periods_are_owner_scoped(user_client: AsyncClient, admin_client: AsyncClient, a_period):
+    user_client, user = user_client
+    admin_client, _ = admin_client
+    period = await a_period(user)
+
+    response = await admin_client.get(f"api/v1/periods/{period.id}")
+    assert response.status_code == 404
+    response = await admin_client.patch(f"api/v1/periods/{period.id}", json={"notes": "not mine"})
+    assert response.status_code == 404
+    response = await admin_client.delete(f"api/v1/periods/{period.id}")
+    assert response.status_code == 404
+
+    response = await user_client.get(f"api/v1/periods/{period.id}")
+    assert response.json()["notes"] == period.notes
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_periods(user_client: AsyncClient):
+    user_client, _ = user_client
+    items = [
+        {"start_date": "2023-01-01", "end_date": "2023-01-04", "flow_intensity": "Heavy",
+         "symptoms": [{"name": "cramps"}]},
+        {"start_date": "not-a-date"},
+        {"start_date": "2023-02-01", "end_date": "2023-02-03"},
+        {"start_date": "2023-03-01", "flow_intensity": "Unknown"},
+    ]
+    response = await user_client.post("api/v1/periods/bulk", json={"items": items})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 2
+    assert body["failed"] == 2
+    assert [error["index"] for error in body["errors"]] == [1, 3]
+
+    response = await user_client.get("api/v1/periods")
+    periods = response.json()["items"]
+    assert {period["id"] for period in periods} == set(body["ids"])
+    assert [len(period["symptoms"]) for period in periods] == [1, 0]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_hides_database_errors(user_client: AsyncClient, monkeypatch):
+    user_client, _ = user_client
+
+    async def reject(*args, **kwargs):
+        raise IntegrityError("INSERT INTO period_day ...", {"user_id": "secret"}, Exception("UNIQUE constraint pk_x"))
+
+    monkeypatch.setattr(PeriodCalendar, "refresh", reject)
+    response = await user_client.post("api/v1/periods/bulk", json={"items": [{"start_date": "2023-01-01"}]})
+    body = response.json()
+    assert body["created"] == 0
+    assert body["errors"][0]["errors"][0]["type"] == "database_error"
+    assert "constraint" not in response.text and "INSERT" not in response.text
+
+
+@pytest.mark.asyncio
+async def test_export_periods(user_client: AsyncClient):
+    user_client, _ = user_client
+    items = [
+        {"start_date": "2023-01-01", "end_date": "2023-01-04", "flow_intensity": "Heavy",
+         "symptoms": [{"name": "cramps"}, {"name": "fatigue", "intensity": "mild"}]},
+        {"start_date": "2023-02-01", "notes": "short, with a comma"},
+    ]
+    await user_client.post("api/v1/periods/bulk", json={"items": items})
+
+    response = await user_client.get("api/v1/periods/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["start_date"] for record in records] == ["2023-01-01", "2023-02-01"]
+    assert {symptom["name"] for symptom in records[0]["symptoms"]} == {"cramps", "fatigue"}
+    assert records[1]["symptoms"] == []
+
+    response = await user_client.get("api/v1/periods/export", params={"format": "csv"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["flow_intensity"] for row in rows] == ["Heavy", ""]
+    assert rows[1]["notes"] == "short, with a comma"
+    assert len(json.loads(rows[0]["symptoms"])) == 2
+
+
+@pytest.mark.asyncio
+async def test_period_changes_sync(user_client: AsyncClient):
+    user_client, _ = user_client
+    first = (await user_client.post("api/v1/periods", json={"start_date": "2024-01-01"})).json()
+    second = (await user_client.post("api/v1/periods", json={"start_date": "2024-02-01"})).json()
+
+    response = await user_client.get("api/v1/periods/changes", params={"limit": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert [period["id"] for period in body["upserts"]] == [first["id"]]
+    assert body["has_more"] is True
+    body = (await user_client.get("api/v1/periods/changes", params={"since": body["next_cursor"]})).json()
+    assert [period["id"] for period in body["upserts"]] == [second["id"]]
+    assert body["deletes"] == []
+    assert body["has_more"] is False
+    cursor = body["next_cursor"]
+
+    await user_client.patch(f"api/v1/periods/{first['id']}", json={"notes": "edited"})
+    await user_client.delete(f"api/v1/periods/{second['id']}")
+
+    body = (await user_client.get("api/v1/periods/changes", params={"since": cursor})).json()
+    assert [(period["id"], period["notes"]) for period in body["upserts"]] == [(first["id"], "edited")]
+    assert body["deletes"] == [second["id"]]
+
+    body = (await user_client.get("api/v1/periods/changes", params={"since": body["next_cursor"]})).json()
+    assert body["upserts"] == [] and body["deletes"] == []
+
+    response = await user_client.get("api/v1/periods/changes", params={"since": "garbage"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_period_changes_follow_commit_order(user_client: AsyncClient, a_session):
+    user_client, user = user_client
+    await user_client.post("api/v1/periods", json={"start_date": "2024-01-01"})
+    cursor = (await user_client.get("api/v1/periods/changes")).json()["next_cursor"]
+
+    # A write stamped before the client synced, committed after it
+    late = Period(
+        user_id=user.id, start_date=date(2024, 2, 1), updated_at=datetime(2000, 1, 1),
+        sync_version=await DataVersionService(a_session).bump(user.id),
+    )
+    a_session.add(late)
+    await a_session.commit()
+
+    body = (await user_client.get("api/v1/periods/changes", params={"since": cursor})).json()
+    assert [period["id"] for period in body["upserts"]] == [str(late.id)]
+
+
+@pytest.mark.asyncio
+async def test_period_tombstones_pruned(user_client: AsyncClient, a_session):
+    user_client, user = user_client
+    first = (await user_client.post("api/v1/periods", json={"start_date": "2024-01-01"})).json()
+    second = (await user_client.post("api/v1/periods", json={"start_date": "2024-02-01"})).json()
+    await user_client.delete(f"api/v1/periods/{first['id']}")
+    stale_cursor = (await user_client.get("api/v1/periods/changes")).json()["next_cursor"]
+    await a_session.execute(update(PeriodTombstone).values(deleted_at=datetime(2000, 1, 1)))
+    await a_session.commit()
+
+    # The next delete prunes the expired tombstone
+    await user_client.delete(f"api/v1/periods/{second['id']}")
+    remaining = (await a_session.execute(select(PeriodTombstone.period_id))).scalars().all()
+    assert [str(period_id) for period_id in remaining] == [second["id"]]
+
+    # A cursor that already saw the pruned delete is still fine...
+    body = (await user_client.get("api/v1/periods/changes", params={"since": stale_cursor})).json()
+    assert body["deletes"] == [second["id"]]
+    # ...one from before it has to resync
+    old_cursor = base64.urlsafe_b64encode(json.dumps(["0", str(UUID(int=0)), "0", str(UUID(int=0))]).encode()).decode()
+    response = await user_client.get("api/v1/periods/changes", params={"since": old_cursor})
+    assert response.status_code == 410
+    assert (await user_client.get("api/v1/periods/changes")).json()["deletes"] == [second["id"]]
+
+
+@pytest.mark.asyncio
+async def test_period_load_profiles(user_client: AsyncClient, a_session):
+    user_client, user = user_client
+    await user_client.post("api/v1/periods", json={"start_date": "2024-03-01", "symptoms": [{"name": "cramps"}]})
+
+    response = await user_client.get("api/v1/periods")
+    assert [len(period["symptoms"]) for period in response.json()["items"]] == [1]
+    # The lean list path renders exactly what the ORM-backed detail endpoint does
+    listed = response.json()["items"][0]
+    assert (await user_client.get(f"api/v1/periods/{listed['id']}")).json() == listed
+    response = await user_client.get("api/v1/periods", params={"include_symptoms": False})
+    assert [period["symptoms"] for period in response.json()["items"]] == [[]]
+
+    a_session.expunge_all()
+    service = PeriodService(a_session, Period)
+    period = await service.get_recent_period(user.id, LoadProfile.IDS)
+    assert set(inspect(period).unloaded) >= {"start_date", "notes"}
+    assert period.symptoms == []
+    a_session.expunge_all()
+    period = await service.get_recent_period(user.id, LoadProfile.AGGREGATE)
+    assert "start_date" not in inspect(period).unloaded
+    assert period.symptoms == []
+    a_session.expunge_all()
+    period = await service.get_recent_period(user.id)
+    assert [symptom.name for symptom in period.symptoms] == ["cramps"]
@@ -0,0 +1,105 @@
+"""
+Index-usage regression suite: every statement a service issues is re-run through
+`EXPLAIN QUERY PLAN`, and the test fails if one falls back to a full scan of a table.
+"""
+import re
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+TABLES = {"user", "period", "symptom", "period_day", "period_tombstone", "data_version"}
+FULL_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+@pytest.fixture
+def engine(a_session):
+    return a_session.bind
+
+
+@pytest.fixture
+def statements(engine):
+    """Collect the SQL (and parameters) the app sends while the test runs"""
+    if engine.dialect.name != "sqlite":
+        pytest.skip("query plans are checked against SQLite")
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _capture)
+    yield captured
+    event.remove(engine.sync_engine, "before_cursor_execute", _capture)
+
+
+async def full_scans(engine, statements, allowed: frozenset = frozenset()) -> list[str]:
+    captured = list(statements)
+    statements.clear()
+    scans = []
+    async with engine.connect() as conn:
+        for statement, parameters in captured:
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            for row in result.all():
+                match = FULL_SCAN.match(row[-1])
+                if match and match.group(1) in TABLES - allowed:
+                    scans.append(f"{row[-1]} <- {statement}")
+    return scans
+
+
+async def create_periods(user_client: AsyncClient, count: int) -> list[str]:
+    ids = []
+    for offset in range(count):
+        start = date.today() - timedelta(days=30 * offset + 5)
+        response = await user_client.post("api/v1/periods", json={
+            "start_date": str(start),
+            "end_date": str(start + timedelta(days=4)),
+            "flow_intensity": "Medium",
+            "symptoms": [{"name": "cramps"}],
+        })
+        ids.append(response.json()["id"])
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_period_writes_use_indexes(user_client: AsyncClient, engine, statements):
+    user_client, _ = user_client
+    period_id, other_id = await create_periods(user_client, 2)
+    await user_client.patch(f"api/v1/periods/{period_id}", json={"flow_intensity": "Heavy"})
+    await user_client.delete(f"api/v1/periods/{other_id}")
+
+    assert await full_scans(engine, statements) == []
+
+
+@pytest.mark.asyncio
+async def test_period_reads_use_indexes(user_client: AsyncClient, engine, statements):
+    user_client, _ = user_client
+    period_id, *_ = await create_periods(user_client, 3)
+    statements.clear()
+
+    await user_client.get("api/v1/periods")
+    response = await user_client.get("api/v1/periods", params={"mode": "cursor", "limit": 1, "total": "exact"})
+    await user_client.get("api/v1/periods", params={"after": response.json()["next_cursor"]})
+    await user_client.get("api/v1/periods/recent")
+    await user_client.get("api/v1/periods/intensity-counts")
+    await user_client.get(f"api/v1/periods/{period_id}")
+    response = await user_client.get("api/v1/periods/changes", params={"limit": 1})
+    await user_client.get("api/v1/periods/changes", params={"since": response.json()["next_cursor"]})
+
+    assert await full_scans(engine, statements) == []
+
+
+@pytest.mark.asyncio
+async def test_user_queries_use_indexes(user_client: AsyncClient, admin_client: AsyncClient, engine, statements):
+    user_client, user = user_client
+    admin_client, _ = admin_client
+
+    await user_client.get("api/v1/users/me")
+    await user_client.patch("api/v1/users/me", json={"first_name": "Ada"})
+    await admin_client.get(f"api/v1/users/{user.id}")
+    assert await full_scans(engine, statements) == []
+
+    # Listing every user is a scan by definition
+    await admin_client.get("api/v1/users")
+    assert await full_scans(engine, statements, allowed=frozenset({"user"})) == []
@@ -0,0 +1,32 @@
+import json
+from datetime import date, datetime
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+
+from app.core.responses import FastJSONResponse, get_default_response_class
+from app.schemas.period import DateIntensityCount, FlowIntensity
+
+
+def test_fast_json_response_encodes_natively():
+    period_id = uuid4()
+    content = {
+        "id": period_id,
+        "start_date": date(2024, 1, 1),
+        "updated_at": datetime(2024, 1, 2, 3, 4, 5),
+        "flow_intensity": FlowIntensity.HEAVY,
+        "counts": [DateIntensityCount(date=date(2024, 1, 1), count=2)],
+    }
+    body = json.loads(FastJSONResponse(content).body)
+    assert body == {
+        "id": str(period_id),
+        "start_date": "2024-01-01",
+        "updated_at": "2024-01-02T03:04:05",
+        "flow_intensity": "Heavy",
+        "counts": [{"date": "2024-01-01", "count": 2}],
+    }
+
+
+def test_default_response_class_is_opt_in():
+    assert get_default_response_class(False) is JSONResponse
+    assert get_default_response_class(True) is FastJSONResponse
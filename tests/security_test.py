@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.security import PasswordWorkerPool, get_password_hash, verify_password
+
+
+@pytest.mark.asyncio
+async def test_password_pool_runs_off_event_loop():
+    pool = PasswordWorkerPool(max_workers=2, max_pending=4)
+    loop_thread = threading.get_ident()
+
+    hashed = await pool.run(get_password_hash, "password")
+    worker_thread = await pool.run(threading.get_ident)
+
+    assert worker_thread != loop_thread
+    assert await pool.run(verify_password, "password", hashed)
+    assert pool.stats()["completed"] == 3
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_pool_rejects_over_admission_limit():
+    pool = PasswordWorkerPool(max_workers=1, max_pending=2)
+    release = threading.Event()
+
+    running = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    assert pool.stats()["pending"] == 2
+    assert pool.stats()["queued"] == 1
+
+    with pytest.raises(HTTPException) as exc_info:
+        await pool.run(release.wait)
+    assert exc_info.value.status_code == 503
+
+    release.set()
+    await asyncio.gather(*running)
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["pending"] == 0
+    pool.shutdown()
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app.api import deps
+from app.core.singleflight import SingleFlight
+from app.services.period import PeriodService, period_reads
+from app.services.user_cache import AuthStateCache, auth_states, user_cache, user_lookups
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"value": calls}
+
+    waiters = [asyncio.create_task(flight.do("key", load)) for _ in range(3)]
+    other = asyncio.create_task(flight.do("other", load))
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, other)
+
+    assert calls == 2
+    assert results[0] is results[1] is results[2]
+    assert flight.stats() == {"in_flight": 0, "leaders": 2, "coalesced": 2}
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fail():
+        await release.wait()
+        raise ValueError("boom")
+
+    waiters = [asyncio.create_task(flight.do("key", fail)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+    async def succeed():
+        return 1
+    assert await flight.do("key", succeed) == 1
+
+
+@pytest.mark.asyncio
+async def test_waiters_retry_when_the_leader_is_cancelled():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+def slowed(calls: list, name: str, fn):
+    """Wrap `fn` so each execution is counted and lasts long enough for parallel callers to pile up."""
+
+    async def wrapper(*args, **kwargs):
+        calls.append(name)
+        await asyncio.sleep(0.05)
+        return await fn(*args, **kwargs)
+
+    return wrapper
+
+
+@pytest.mark.asyncio
+async def test_parallel_dashboard_requests(user_client: AsyncClient, monkeypatch):
+    user_client, _ = user_client
+    await user_client.post("api/v1/periods", json={"start_date": "2024-01-01"})
+    calls = []
+    monkeypatch.setattr(PeriodService, "_load_recent_period", slowed(calls, "recent", PeriodService._load_recent_period))
+    monkeypatch.setattr(
+        PeriodService, "_load_period_intensity_counts",
+        slowed(calls, "counts", PeriodService._load_period_intensity_counts)
+    )
+    monkeypatch.setattr(AuthStateCache, "_load", slowed(calls, "auth", AuthStateCache._load))
+    auth_states.clear()
+    before = period_reads.stats()
+
+    responses = await asyncio.gather(*[
+        user_client.get(path)
+        for path in ["api/v1/periods/recent", "api/v1/periods/intensity-counts"] * 4
+    ])
+    assert all(response.status_code == 200 for response in responses)
+    assert all(response.json() == responses[index % 2].json() for index, response in enumerate(responses))
+
+    # One execution per distinct read; the other callers joined it
+    assert sorted(calls) == ["auth", "counts", "recent"]
+    after = period_reads.stats()
+    assert (after["leaders"] - before["leaders"], after["coalesced"] - before["coalesced"]) == (2, 6)
+
+
+@pytest.mark.asyncio
+async def test_parallel_writes_share_one_user_lookup(user_client: AsyncClient, monkeypatch):
+    user_client, _ = user_client
+    calls = []
+    monkeypatch.setattr(deps, "_load_user", slowed(calls, "user", deps._load_user))
+    user_cache.clear()
+    before = user_lookups.stats()
+
+    responses = await asyncio.gather(*[
+        user_client.post("api/v1/periods", json={"start_date": f"2024-0{month}-01"}) for month in range(1, 5)
+    ])
+    assert all(response.status_code == 201 for response in responses)
+    assert calls == ["user"]
+    after = user_lookups.stats()
+    assert (after["leaders"] - before["leaders"], after["coalesced"] - before["coalesced"]) == (1, 3)
@@ -2,6 +2,17 @@ from uuid import uuid4
 
 from httpx import AsyncClient
 import pytest
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.models.calendar import PeriodDay
+from app.models.data_version import DataVersion
+from app.models.period import Period, PeriodTombstone
+from app.models.symptoms import Symptom
+from app.models.user import User
+from app.services.jobs import job_runner
+from app.services.user import settings as user_settings
+from tests.conftest import async_session_maker
 
 
 @pytest.mark.asyncio
@@ -30,6 +41,9 @@ async def test_get_users(admin_client: AsyncClient):
     response = await admin_client.get("/api/v1/users")
     assert response.status_code == 200
     assert len(response.json()["items"]) == 1
+    listed = response.json()["items"][0]
+    assert "hashed_password" not in listed
+    assert (await admin_client.get(f"/api/v1/users/{listed['id']}")).json() == listed
 
 
 @pytest.mark.asyncio
@@ -106,3 +120,89 @@ async def test_delete_user(admin_client: AsyncClient, normal_user):
     user_id = normal_user.id
     response = await admin_client.delete(f"api/v1/users/{user_id}")
     assert response.status_code in [204, 404]
+
+
+@pytest.mark.asyncio
+async def test_read_user_me_after_update(user_client: AsyncClient, faker):
+    user_client, _ = user_client
+    response = await user_client.get("api/v1/users/me")
+    assert response.status_code == 200
+
+    update_data = {"first_name": faker.first_name()}
+    response = await user_client.patch("api/v1/users/me", json=update_data)
+    assert response.status_code == 200
+
+    response = await user_client.get("api/v1/users/me")
+    assert response.json()["first_name"] == update_data["first_name"]
+
+
+async def create_history(client: AsyncClient, count: int):
+    for day in range(1, count + 1):
+        response = await client.post("api/v1/periods", json={
+            "start_date": f"2026-03-{day:02d}", "end_date": f"2026-03-{day:02d}", "symptoms": [{"name": "cramps"}]
+        })
+        assert response.status_code == 201
+    # Leaves a tombstone behind
+    assert (await client.delete(f"api/v1/periods/{response.json()['id']}")).status_code == 204
+
+
+async def remaining_rows(user_id) -> dict:
+    async with async_session_maker() as session:
+        async def count(model, *where):
+            return (await session.execute(select(func.count()).select_from(model).where(*where))).scalar_one()
+
+        return {
+            "periods": await count(Period, Period.user_id == user_id),
+            # Only this user has symptoms, so any left over are orphans
+            "symptoms": await count(Symptom),
+            "period_days": await count(PeriodDay, PeriodDay.user_id == user_id),
+            "tombstones": await count(PeriodTombstone, PeriodTombstone.user_id == user_id),
+            "data_version": await count(DataVersion, DataVersion.user_id == user_id),
+            "user": await count(User, User.id == user_id),
+        }
+
+
+@pytest.mark.asyncio
+async def test_delete_user_with_history(user_client, admin_client):
+    user_client, user = user_client
+    admin_client, _ = admin_client
+    await create_history(user_client, 3)
+    assert (await remaining_rows(user.id))["symptoms"] == 2
+
+    response = await admin_client.delete(f"api/v1/users/{user.id}")
+    assert response.status_code == 204
+    assert set((await remaining_rows(user.id)).values()) == {0}
+    # Outstanding tokens stop working immediately
+    assert (await user_client.get("api/v1/periods")).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_delete_large_user_in_background(user_client, admin_client, monkeypatch):
+    user_client, user = user_client
+    admin_client, _ = admin_client
+    monkeypatch.setattr(user_settings, "user_delete_inline_max_periods", 1)
+    monkeypatch.setattr(user_settings, "user_delete_chunk_size", 2)
+    monkeypatch.setattr(job_runner, "session_factory", async_session_maker)
+    await create_history(user_client, 4)
+
+    response = await admin_client.delete(f"api/v1/users/{user.id}")
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    # Deactivated right away, purged by the job
+    assert (await user_client.get("api/v1/periods")).status_code == 401
+    assert (await remaining_rows(user.id))["periods"] == 3
+
+    assert await job_runner.run_pending() == 1
+    response = await admin_client.get(f"api/v1/jobs/{job_id}")
+    assert response.json()["status"] == "succeeded"
+    assert response.json()["result"] == {"symptoms": 3, "periods": 3, "period_days": 3, "tombstones": 1}
+    assert set((await remaining_rows(user.id)).values()) == {0}
+
+
+@pytest.mark.asyncio
+async def test_list_users_total_not_flagged_estimate_without_planner(admin_client, normal_user):
+    admin_client, _ = admin_client
+    # The listing asks for an estimate; SQLite has none, so the count is exact and must say so
+    body = (await admin_client.get("api/v1/users")).json()
+    assert body["total"] == 2
+    assert body["total_is_estimate"] is False